@@ -7,17 +7,31 @@ Tesseract dependency so its extraction rules can be unit-tested quickly.
 
 from __future__ import annotations
 
+import hashlib
 import re
 import unicodedata
 from collections import OrderedDict
 from datetime import date, datetime, timedelta
 from decimal import Decimal, InvalidOperation
+from functools import lru_cache
 from statistics import mean
-from typing import Any, Dict, Iterable, List, Optional, Sequence
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 
 ACCOUNT_NUMBER_LENGTH = 22
 
+# BCRA check-digit weights for the two CBU/CVU blocks: digits 1-7 (entity and
+# branch, checked by digit 8) and digits 9-21 (account, checked by digit 22).
+ACCOUNT_BLOCK_WEIGHTS = ((7, 1, 3, 9, 7, 1, 3), (3, 9, 7, 1, 3, 9, 7, 1, 3, 9, 7, 1, 3))
+
+# Known accounts are split into this many segments for near-match lookups;
+# by pigeonhole, a number within ACCOUNT_MATCH_MAX_DISTANCE substitutions of a
+# known account shares at least one whole segment with it.
+ACCOUNT_MATCH_MAX_DISTANCE = 2
+ACCOUNT_INDEX_SEGMENTS = ACCOUNT_MATCH_MAX_DISTANCE + 1
+
+FIELD_NAMES = ("payer_name", "account", "amount", "payment_date")
+
 MONTH_MAP = {
     "ene": 1,
     "enero": 1,
@@ -91,6 +105,13 @@ NAME_NEXT_LINE_PATTERN = re.compile(
     r"^\s*(?:de|desde|emisor|enviado por|ordenante|pagador|titular|nombre)\s*:?\s*$",
     re.IGNORECASE,
 )
+# Matched against each line's accent-free, lower-case text (see OcrLine).
+TRANSFER_STATUS_PATTERN = re.compile(r"\btransferencia\s+(?:recibida|realizada|enviada)\b")
+AMOUNT_KEYWORD_PATTERN = re.compile(r"\b(?:monto|importe|total)\b")
+DATE_KEYWORD_PATTERN = re.compile(
+    r"\b(?:creada|creado|fecha|operacion|transferencia|pago)\b"
+)
+DIGIT_PATTERN = re.compile(r"\d")
 
 NOISE_NAME_WORDS = {
     "mercado pago",
@@ -114,85 +135,429 @@ NOISE_NAME_WORDS = {
     "identificacion",
 }
 
+Box = Tuple[int, int, int, int]
+
+
+class OcrWord:
+    __slots__ = ("text", "confidence", "box")
+
+    def __init__(
+        self,
+        text: str,
+        confidence: Optional[float],
+        box: Optional[Box] = None,
+    ) -> None:
+        self.text = text
+        self.confidence = confidence
+        self.box = box
+
+    def as_dict(self) -> Dict[str, Any]:
+        word: Dict[str, Any] = {"text": self.text, "confidence": self.confidence}
+        if self.box is not None:
+            word["box"] = self.box
+        return word
+
+
+class OcrLine:
+    """One OCR line with the text checks every field extractor shares.
+
+    The checks come from ``_line_features``, so a line text that several
+    passes read is only normalized and searched once.
+    """
+
+    __slots__ = (
+        "index",
+        "text",
+        "confidence",
+        "box",
+        "words",
+        "normalized",
+        "has_digit",
+        "account_label",
+        "currency_mark",
+        "amount_keyword",
+        "date_keyword",
+    )
+
+    def __init__(
+        self,
+        index: int,
+        text: str,
+        confidence: Optional[float] = None,
+        box: Optional[Box] = None,
+        words: Sequence[OcrWord] = (),
+    ) -> None:
+        self.index = index
+        self.text = text
+        self.confidence = confidence
+        self.box = box
+        self.words = words
+        (
+            self.normalized,
+            self.has_digit,
+            self.account_label,
+            self.currency_mark,
+            self.amount_keyword,
+            self.date_keyword,
+        ) = _line_features(text)
+
+
+class ReceiptField:
+    """Base record for the four parsed receipt fields.
+
+    ``as_dict`` gives the JSON shape the bridge returns: ``FOUND_KEYS`` for a
+    field that was read, ``MISSING_KEYS`` otherwise, plus ``source_attempt``
+    once a merge picked it.  ``box`` is the line's pixel box in the reading
+    pass and stays internal.
+    """
+
+    __slots__ = ("value", "confidence", "validation", "box", "source_attempt")
+    FOUND_KEYS: Tuple[str, ...] = ("value", "confidence", "validation")
+    MISSING_KEYS: Tuple[str, ...] = ("value", "confidence", "validation")
+
+    def __init__(
+        self,
+        value: Optional[str] = None,
+        confidence: Optional[float] = None,
+        validation: str = "missing",
+        box: Optional[Box] = None,
+    ) -> None:
+        self.value = value
+        self.confidence = confidence
+        self.validation = validation
+        self.box = box
+        self.source_attempt: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        keys = self.MISSING_KEYS if self.validation == "missing" else self.FOUND_KEYS
+        result = {key: getattr(self, key) for key in keys}
+        if self.source_attempt is not None:
+            result["source_attempt"] = self.source_attempt
+        return result
+
+
+class PayerField(ReceiptField):
+    __slots__ = ("source",)
+    FOUND_KEYS = ("value", "confidence", "validation", "source")
+
+    def __init__(self, *args: Any, source: Optional[str] = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.source = source
+
+
+class AccountField(ReceiptField):
+    __slots__ = ("type", "formatted", "votes")
+    FOUND_KEYS = ("type", "value", "formatted", "confidence", "validation")
+    MISSING_KEYS = FOUND_KEYS
+
+    def __init__(self, *args: Any, type: Optional[str] = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.type = type
+        self.formatted = group_account_number(self.value or "")
+        self.votes: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        result = super().as_dict()
+        if self.votes is not None:
+            result["votes"] = self.votes
+        return result
+
+
+class AmountField(ReceiptField):
+    __slots__ = ("amount", "raw", "display", "currency", "score")
+    FOUND_KEYS = ("value", "raw", "display", "currency", "confidence", "validation")
+    MISSING_KEYS = ("value", "currency", "confidence", "validation")
+
+    def __init__(
+        self,
+        *args: Any,
+        amount: Optional[Decimal] = None,
+        raw: Optional[str] = None,
+        display: Optional[str] = None,
+        score: int = 0,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.amount = amount
+        self.raw = raw
+        self.display = display
+        self.currency = "ARS"
+        self.score = score
+
+
+class DateField(ReceiptField):
+    __slots__ = ("moment", "datetime", "display", "time", "raw", "year_inferred", "score")
+    FOUND_KEYS = (
+        "value",
+        "datetime",
+        "display",
+        "time",
+        "raw",
+        "confidence",
+        "validation",
+        "year_inferred",
+    )
+    MISSING_KEYS = ("value", "datetime", "display", "confidence", "validation")
+
+    def __init__(
+        self,
+        *args: Any,
+        moment: Optional[datetime] = None,
+        datetime: Optional[str] = None,
+        display: Optional[str] = None,
+        time: Optional[str] = None,
+        raw: Optional[str] = None,
+        year_inferred: Optional[bool] = None,
+        score: int = 0,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        # The payment date and time, or midnight when the receipt shows no time.
+        self.moment = moment
+        self.datetime = datetime
+        self.display = display
+        self.time = time
+        self.raw = raw
+        self.year_inferred = year_inferred
+        self.score = score
+
+
+class ParsedReceipt:
+    """Fields, warnings and, after a merge, the pass summary of one receipt.
+
+    Parsing and merging pass these records around; ``as_dict`` is the one
+    conversion to the JSON the bridge returns.
+    """
+
+    __slots__ = (
+        "fields",
+        "missing_fields",
+        "warnings",
+        "text",
+        "ocr_attempt",
+        "average_confidence",
+        "attempts",
+    )
+
+    def __init__(
+        self,
+        fields: Dict[str, ReceiptField],
+        missing_fields: List[str],
+        warnings: List[Dict[str, str]],
+    ) -> None:
+        self.fields = fields
+        self.missing_fields = missing_fields
+        self.warnings = warnings
+        self.text: Optional[str] = None
+        self.ocr_attempt: Optional[str] = None
+        self.average_confidence: Optional[float] = None
+        self.attempts: Optional[List[Dict[str, Any]]] = None
+
+    def canonical(self) -> Dict[str, Any]:
+        """Typed values for storing the transfer; ``None`` where unusable.
+
+        ``account`` is the 22-digit string, ``amount`` a Decimal quantized to
+        cents and ``payment_datetime`` a datetime (midnight when the receipt
+        shows no time).
+        """
+        account = self.fields["account"].value
+        return {
+            "account": account if account and len(account) == ACCOUNT_NUMBER_LENGTH else None,
+            "amount": self.fields["amount"].amount,
+            "payment_datetime": self.fields["payment_date"].moment,
+        }
+
+    def as_dict(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "fields": {name: field.as_dict() for name, field in self.fields.items()},
+            "missing_fields": self.missing_fields,
+            "warnings": self.warnings,
+            "canonical": encode_canonical(self.canonical()),
+        }
+        if self.attempts is not None:
+            result["text"] = self.text
+            result["ocr_attempt"] = self.ocr_attempt
+            result["average_confidence"] = self.average_confidence
+            result["attempts"] = self.attempts
+        return result
+
+
+class _ParsedAttempt:
+    __slots__ = ("name", "text", "lines", "parsed")
+
+    def __init__(
+        self,
+        name: Optional[str],
+        text: str,
+        lines: List[OcrLine],
+        parsed: ParsedReceipt,
+    ) -> None:
+        self.name = name
+        self.text = text
+        self.lines = lines
+        self.parsed = parsed
+
 
 def parse_mercado_pago_text(
     text: str,
     *,
-    ocr_lines: Optional[Sequence[Dict[str, Any]]] = None,
+    ocr_lines: Optional[Sequence[Any]] = None,
     today: Optional[date] = None,
-) -> Dict[str, Any]:
+) -> ParsedReceipt:
+    return _parse_lines(normalize_ocr_lines(text, ocr_lines), today=today)
+
+
+def _parse_lines(lines: Sequence[OcrLine], *, today: Optional[date]) -> ParsedReceipt:
     today = today or date.today()
-    lines = normalize_ocr_lines(text, ocr_lines)
-    account = extract_account(lines)
-    fields = {
-        "payer_name": extract_payer_name(lines, account),
-        "account": account["field"],
+    account, account_line_index, account_warning = extract_account(lines)
+    fields: Dict[str, ReceiptField] = {
+        "payer_name": extract_payer_name(lines, account_line_index),
+        "account": account,
         "amount": extract_amount(lines),
         "payment_date": extract_payment_date(lines, today=today),
     }
-    return build_parsed_result(fields, account.get("warning"))
+    return build_parsed_result(fields, account_warning)
 
 
 def merge_ocr_attempts(
     attempts: Sequence[Dict[str, Any]],
     *,
     today: Optional[date] = None,
-) -> Dict[str, Any]:
+) -> ParsedReceipt:
     """Select the strongest field from all PATNAV OCR preprocessing passes."""
-    parsed_attempts: List[Dict[str, Any]] = []
+    parsed_attempts: List[_ParsedAttempt] = []
     for attempt in attempts:
         text = str(attempt.get("text") or "")
-        parsed = parse_mercado_pago_text(
-            text,
-            ocr_lines=attempt.get("lines") or None,
-            today=today,
+        lines = normalize_ocr_lines(text, attempt.get("lines") or None)
+        parsed_attempts.append(
+            _ParsedAttempt(attempt.get("name"), text, lines, _parse_lines(lines, today=today))
         )
-        parsed_attempts.append({**attempt, "parsed": parsed})
 
     if not parsed_attempts:
         return parse_mercado_pago_text("", today=today)
 
-    fields: Dict[str, Dict[str, Any]] = {}
-    for field_name in ("payer_name", "account", "amount", "payment_date"):
-        candidates = [
-            (attempt["parsed"]["fields"][field_name], attempt)
-            for attempt in parsed_attempts
-        ]
+    fields: Dict[str, ReceiptField] = {}
+    for field_name in FIELD_NAMES:
         selected, source = max(
-            candidates,
+            (
+                (attempt.parsed.fields[field_name], attempt)
+                for attempt in parsed_attempts
+            ),
             key=lambda pair: _field_score(field_name, pair[0]),
         )
-        selected = dict(selected)
-        if selected.get("validation") != "missing":
-            selected["source_attempt"] = source.get("name")
+        if selected.validation != "missing":
+            selected.source_attempt = source.name
         fields[field_name] = selected
 
+    fields["account"] = vote_account(parsed_attempts, fields["account"])
     merged = build_parsed_result(fields)
     best_attempt = max(parsed_attempts, key=_attempt_score)
-    merged["text"] = best_attempt.get("text") or ""
-    merged["ocr_attempt"] = best_attempt.get("name")
-    merged["average_confidence"] = average_line_confidence(
-        best_attempt.get("lines") or []
-    )
-    merged["attempts"] = [
+    merged.text = best_attempt.text
+    merged.ocr_attempt = best_attempt.name
+    merged.average_confidence = average_line_confidence(best_attempt.lines)
+    merged.attempts = [
         {
-            "name": attempt.get("name"),
-            "average_confidence": average_line_confidence(attempt.get("lines") or []),
-            "text_length": len(str(attempt.get("text") or "")),
-            "missing_fields": attempt["parsed"]["missing_fields"],
+            "name": attempt.name,
+            "average_confidence": average_line_confidence(attempt.lines),
+            "text_length": len(attempt.text),
+            "missing_fields": attempt.parsed.missing_fields,
         }
         for attempt in parsed_attempts
     ]
     return merged
 
 
+def encode_canonical(values: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """JSON form of ``ParsedReceipt.canonical``, reversed by ``decode_canonical``."""
+    amount = values.get("amount")
+    moment = values.get("payment_datetime")
+    return {
+        "account": values.get("account"),
+        "amount": str(amount) if amount is not None else None,
+        "payment_datetime": moment.isoformat() if moment is not None else None,
+    }
+
+
+def decode_canonical(data: Any) -> Optional[Dict[str, Any]]:
+    """Typed values from an analysis' ``canonical`` entry.
+
+    Returns ``None`` when the entry is absent or malformed; missing values
+    stay ``None``.
+    """
+    if not isinstance(data, dict):
+        return None
+    account = data.get("account")
+    amount = data.get("amount")
+    moment = data.get("payment_datetime")
+    if account is not None and not re.fullmatch(r"\d{22}", str(account)):
+        return None
+    try:
+        return {
+            "account": str(account) if account is not None else None,
+            "amount": Decimal(str(amount)).quantize(Decimal("0.01")) if amount is not None else None,
+            "payment_datetime": datetime.fromisoformat(str(moment)) if moment is not None else None,
+        }
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def receipt_key(
+    account: str,
+    amount: Decimal,
+    moment: datetime,
+    image_sha256: str,
+) -> str:
+    """Deterministic identity of a stored receipt.
+
+    Hashes the canonical account, amount (to the cent) and payment time (to
+    the second) together with the image's SHA-256, so storing the same
+    receipt twice yields the same key.
+    """
+    material = "|".join(
+        (
+            str(account),
+            str(Decimal(amount).quantize(Decimal("0.01"))),
+            moment.replace(microsecond=0).isoformat(),
+            str(image_sha256 or "").lower(),
+        )
+    )
+    return hashlib.sha256(material.encode("ascii")).hexdigest()
+
+
+def incomplete_fields(
+    parsed: ParsedReceipt,
+    *,
+    min_confidence: float = 0.0,
+) -> List[str]:
+    """Return the fields that still justify another OCR pass.
+
+    A field is incomplete when it is missing, when the account does not
+    pass the CBU/CVU checksum, or when its line confidence is below
+    ``min_confidence``.  A checksum-valid account is complete whatever its
+    confidence, and fields parsed from plain text have no confidence and are
+    accepted as found.
+    """
+    pending: List[str] = []
+    for field_name in FIELD_NAMES:
+        field = parsed.fields[field_name]
+        validation = field.validation
+        confidence = field.confidence
+        if validation == "missing":
+            pending.append(field_name)
+        elif field_name == "account":
+            if validation != "valid":
+                pending.append(field_name)
+        elif isinstance(confidence, (int, float)) and confidence < min_confidence:
+            pending.append(field_name)
+    return pending
+
+
 def build_parsed_result(
-    fields: Dict[str, Dict[str, Any]],
+    fields: Dict[str, ReceiptField],
     account_warning: Optional[Dict[str, str]] = None,
-) -> Dict[str, Any]:
+) -> ParsedReceipt:
     warnings: List[Dict[str, str]] = []
-    payment_date = fields["payment_date"]
-    if payment_date.get("year_inferred"):
+    if fields["payment_date"].year_inferred:
         warnings.append(
             {
                 "code": "DATE_YEAR_INFERRED",
@@ -203,28 +568,31 @@ def build_parsed_result(
     account = fields["account"]
     if account_warning:
         warnings.append(account_warning)
-    elif account.get("validation") == "invalid_length":
+    elif account.validation == "invalid_length":
         warnings.append(
             {
                 "code": "ACCOUNT_LENGTH_UNCLEAR",
                 "message": "El CBU/CVU detectado no tiene 22 dígitos.",
             }
         )
+    elif account.validation == "invalid_checksum":
+        warnings.append(
+            {
+                "code": "ACCOUNT_CHECKSUM_FAILED",
+                "message": "Los dígitos verificadores del CBU/CVU detectado no coinciden.",
+            }
+        )
 
     missing_fields = [
         field_name
-        for field_name, value in fields.items()
-        if value.get("validation") == "missing"
+        for field_name, field in fields.items()
+        if field.validation == "missing"
     ]
-    return {
-        "fields": fields,
-        "missing_fields": missing_fields,
-        "warnings": warnings,
-    }
+    return ParsedReceipt(fields, missing_fields, warnings)
 
 
-def ocr_data_to_lines(ocr_data: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
-    grouped: "OrderedDict[Any, Dict[str, List[Any]]]" = OrderedDict()
+def ocr_data_to_lines(ocr_data: Dict[str, Sequence[Any]]) -> List[OcrLine]:
+    grouped: "OrderedDict[Any, List[OcrWord]]" = OrderedDict()
     texts = ocr_data.get("text", [])
     total = len(texts)
     for index in range(total):
@@ -244,253 +612,307 @@ def ocr_data_to_lines(ocr_data: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]
                 ("line_num", 0),
             )
         )
-        group = grouped.setdefault(key, {"words": [], "confidences": []})
-        group["words"].append(text)
-        group["confidences"].append(confidence)
-
-    return [
-        {
-            "index": index,
-            "text": " ".join(group["words"]),
-            "confidence": round(mean(group["confidences"]), 3),
-        }
-        for index, group in enumerate(grouped.values())
+        grouped.setdefault(key, []).append(
+            OcrWord(text, confidence, _word_box(ocr_data, index))
+        )
+    return _group_lines(grouped.values())
+
+
+def tsv_to_lines(tsv: str) -> List[OcrLine]:
+    """Group tesseract's TSV output straight into ``OcrLine`` records.
+
+    Gives the same lines as ``ocr_data_to_lines`` on ``image_to_data``
+    output without building the per-word dict of lists first: only word rows
+    (level 5) are split, the numeric columns are converted a column at a
+    time, and the page/block/paragraph/line columns are zipped into one
+    grouping key per word.
+    """
+    rows = [
+        row
+        for row in (line.split("\t", 11) for line in tsv.splitlines() if line.startswith("5\t"))
+        if len(row) == 12
     ]
+    if not rows:
+        return []
+    (
+        _levels,
+        pages,
+        blocks,
+        paragraphs,
+        line_numbers,
+        _word_numbers,
+        lefts,
+        tops,
+        widths,
+        heights,
+        confidences,
+        texts,
+    ) = zip(*rows)
+    grouped: Dict[Tuple[str, str, str, str], List[OcrWord]] = {}
+    for key, text, confidence, left, top, width, height in zip(
+        zip(pages, blocks, paragraphs, line_numbers),
+        map(str.strip, texts),
+        map(float, confidences),
+        map(int, lefts),
+        map(int, tops),
+        map(int, widths),
+        map(int, heights),
+    ):
+        if not text or confidence < 0:
+            continue
+        grouped.setdefault(key, []).append(
+            OcrWord(text, round(confidence / 100, 3), (left, top, left + width, top + height))
+        )
+    return _group_lines(grouped.values())
+
+
+def locate_field_regions(
+    lines: Sequence[OcrLine],
+) -> Dict[str, Box]:
+    """Return pixel boxes around the CBU/CVU and amount lines of one OCR pass.
+
+    ``lines`` must come from ``ocr_data_to_lines`` so they carry ``box``.
+    The account region spans the label line and the line after it, where the
+    digits usually wrap; the amount region spans the best amount line, plus
+    the next line when the label stands alone.  Fields whose lines cannot be
+    found are left out.
+    """
+    regions: Dict[str, Box] = {}
+
+    for index, line in enumerate(lines):
+        if line.account_label:
+            span = lines[index:index + 2]
+        elif len(normalize_account_digits(line.text)) == ACCOUNT_NUMBER_LENGTH:
+            span = lines[index:index + 1]
+        else:
+            continue
+        boxes = [item.box for item in span if item.box]
+        if boxes:
+            regions["account"] = union_boxes(boxes)
+            break
+
+    best_score = 0
+    for index, line in enumerate(lines):
+        text = line.text
+        has_label = line.amount_keyword
+        if LABELED_AMOUNT_PATTERN.search(text):
+            score, span = 3 + 2 * has_label, lines[index:index + 1]
+        elif CURRENCY_AMOUNT_PATTERN.search(text):
+            score, span = 2, lines[index:index + 1]
+        elif has_label:
+            score, span = 1, lines[index:index + 2]
+        else:
+            continue
+        boxes = [item.box for item in span if item.box]
+        if boxes and score > best_score:
+            best_score = score
+            regions["amount"] = union_boxes(boxes)
+
+    return regions
+
+
+def union_boxes(boxes: Iterable[Sequence[int]]) -> Box:
+    lefts, tops, rights, bottoms = zip(*boxes)
+    return (min(lefts), min(tops), max(rights), max(bottoms))
 
 
 def normalize_ocr_lines(
     text: str,
-    ocr_lines: Optional[Sequence[Dict[str, Any]]] = None,
-) -> List[Dict[str, Any]]:
+    ocr_lines: Optional[Sequence[Any]] = None,
+) -> List[OcrLine]:
+    """Return the non-blank lines as ``OcrLine`` records for the extractors.
+
+    Lines from ``ocr_data_to_lines`` are used as they are; plain mappings with
+    ``text``, ``confidence`` and ``box`` keys are converted.
+    """
     if ocr_lines is not None:
-        return [
-            {
-                "index": index,
-                "text": str(line.get("text") or "").strip(),
-                "confidence": line.get("confidence"),
-            }
-            for index, line in enumerate(ocr_lines)
-            if str(line.get("text") or "").strip()
-        ]
+        scanned: List[OcrLine] = []
+        for index, line in enumerate(ocr_lines):
+            if isinstance(line, OcrLine):
+                if line.text:
+                    scanned.append(line)
+                continue
+            line_text = str(line.get("text") or "").strip()
+            if line_text:
+                box = line.get("box")
+                scanned.append(
+                    OcrLine(index, line_text, line.get("confidence"), tuple(box) if box else None)
+                )
+        return scanned
     return [
-        {"index": index, "text": line.strip(), "confidence": None}
+        OcrLine(index, line.strip())
         for index, line in enumerate(text.splitlines())
         if line.strip()
     ]
 
 
-def extract_account(lines: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+def extract_account(
+    lines: Sequence[OcrLine],
+) -> Tuple[AccountField, Optional[int], Optional[Dict[str, str]]]:
+    """Return the account field, its position in ``lines`` and any warning."""
     for index, line in enumerate(lines):
-        text = str(line["text"])
-        match = ACCOUNT_INLINE_PATTERN.search(text)
+        text = line.text
+        label_match = line.account_label
+        match = ACCOUNT_INLINE_PATTERN.search(text) if label_match else None
         if match:
             digits = normalize_account_digits(match.group(2))
             if len(digits) < 10 and index + 1 < len(lines):
                 digits = normalize_account_digits(
-                    f"{match.group(2)} {lines[index + 1]['text']}"
+                    f"{match.group(2)} {lines[index + 1].text}"
                 )
             if len(digits) >= 10:
-                return build_account_field(normalize_account_type(match.group(1)), digits, line)
+                field, warning = build_account_field(
+                    normalize_account_type(match.group(1)),
+                    digits,
+                    line.confidence,
+                    line.box,
+                )
+                return field, index, warning
 
-        label_match = ACCOUNT_LABEL_PATTERN.search(text)
         if label_match and index + 1 < len(lines):
-            digits = normalize_account_digits(str(lines[index + 1]["text"]))
+            next_line = lines[index + 1]
+            digits = normalize_account_digits(next_line.text)
             if len(digits) >= 10:
-                return build_account_field(
+                boxes = [item.box for item in (line, next_line) if item.box]
+                field, warning = build_account_field(
                     normalize_account_type(label_match.group(1)),
                     digits,
-                    {
-                        "index": index,
-                        "confidence": combine_confidences(
-                            line.get("confidence"), lines[index + 1].get("confidence")
-                        ),
-                    },
+                    combine_confidences(line.confidence, next_line.confidence),
+                    union_boxes(boxes) if boxes else None,
                 )
+                return field, index, warning
 
         digit_match = DIGIT_RUN_PATTERN.search(text)
         if digit_match:
             digits = normalize_account_digits(digit_match.group(0))
             if len(digits) == ACCOUNT_NUMBER_LENGTH:
-                result = build_account_field(None, digits, line)
-                result["warning"] = {
+                field, _warning = build_account_field(None, digits, line.confidence, line.box)
+                return field, index, {
                     "code": "ACCOUNT_TYPE_NOT_FOUND",
                     "message": "Se detectó una cuenta sin etiqueta CBU/CVU.",
                 }
-                return result
 
-    return {
-        "line_index": None,
-        "field": {
-            "type": None,
-            "value": None,
-            "formatted": None,
-            "confidence": None,
-            "validation": "missing",
-        },
-    }
+    return AccountField(), None, None
 
 
 def build_account_field(
     account_type: Optional[str],
     digits: str,
-    line: Dict[str, Any],
-) -> Dict[str, Any]:
+    confidence: Optional[float],
+    box: Optional[Box] = None,
+) -> Tuple[AccountField, Optional[Dict[str, str]]]:
     original_length = len(digits)
     if original_length > ACCOUNT_NUMBER_LENGTH:
         digits = digits[:ACCOUNT_NUMBER_LENGTH]
-    validation = "valid" if len(digits) == ACCOUNT_NUMBER_LENGTH else "invalid_length"
-    result = {
-        "line_index": line.get("index"),
-        "field": {
-            "type": account_type,
-            "value": digits,
-            "formatted": group_account_number(digits),
-            "confidence": line.get("confidence"),
-            "validation": validation,
-        },
-    }
+    if len(digits) != ACCOUNT_NUMBER_LENGTH:
+        validation = "invalid_length"
+    elif account_checksum_valid(digits):
+        validation = "valid"
+    else:
+        validation = "invalid_checksum"
+    field = AccountField(digits, confidence, validation, box, type=account_type)
+    warning = None
     if original_length > ACCOUNT_NUMBER_LENGTH:
-        result["warning"] = {
+        warning = {
             "code": "ACCOUNT_NUMBER_TRUNCATED",
             "message": "Se detectaron más de 22 dígitos y se tomó el primer bloque.",
         }
-    return result
+    return field, warning
 
 
 def extract_payer_name(
-    lines: Sequence[Dict[str, Any]],
-    account: Dict[str, Any],
-) -> Dict[str, Any]:
+    lines: Sequence[OcrLine],
+    account_line_index: Optional[int],
+) -> PayerField:
     for index, line in enumerate(lines):
-        if re.search(
-            r"\btransferencia\s+(?:recibida|realizada|enviada)\b",
-            normalize_text_for_matching(str(line["text"])),
-        ) and index > 0:
-            name = clean_name(str(lines[index - 1]["text"]))
+        if index > 0 and TRANSFER_STATUS_PATTERN.search(line.normalized):
+            name = clean_name(lines[index - 1].text)
             if name:
                 return _found_field(name, lines[index - 1], "before_transfer_status")
 
     for index, line in enumerate(lines):
-        text = str(line["text"])
+        text = line.text
         match = NAME_LABEL_PATTERN.search(text)
         if match:
             name = clean_name(match.group(1))
             if name:
                 return _found_field(name, line, "labeled_line")
         if NAME_NEXT_LINE_PATTERN.match(text) and index + 1 < len(lines):
-            name = clean_name(str(lines[index + 1]["text"]))
+            name = clean_name(lines[index + 1].text)
             if name:
                 return _found_field(name, lines[index + 1], "line_after_label")
 
-    account_line_index = account.get("line_index")
     if isinstance(account_line_index, int) and account_line_index > 0:
         for candidate_index in range(account_line_index - 1, max(-1, account_line_index - 4), -1):
             candidate = lines[candidate_index]
-            name = clean_name(str(candidate["text"]))
+            name = clean_name(candidate.text)
             if name:
                 return _found_field(name, candidate, "near_account")
-    return {"value": None, "confidence": None, "validation": "missing"}
+    return PayerField()
 
 
-def extract_amount(lines: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
-    candidates: List[Dict[str, Any]] = []
+def extract_amount(lines: Sequence[OcrLine]) -> AmountField:
+    selected: Optional[AmountField] = None
     for line in lines:
-        text = str(line["text"])
+        if not line.has_digit:
+            continue
+        text = line.text
+        line_bonus = (2 if line.amount_keyword else 0) + (1 if line.currency_mark else 0)
         for pattern, base_score in (
             (LABELED_AMOUNT_PATTERN, 3),
             (CURRENCY_AMOUNT_PATTERN, 2),
         ):
+            if pattern is CURRENCY_AMOUNT_PATTERN and not line.currency_mark:
+                continue
             for match in pattern.finditer(text):
+                score = base_score + line_bonus
+                if selected is not None and score <= selected.score:
+                    continue
                 parsed = parse_amount(match.group(1))
                 if parsed is None:
                     continue
-                score = base_score
-                if re.search(r"\b(?:monto|importe|total)\b", text, re.IGNORECASE):
-                    score += 2
-                if "$" in text or "§" in text or "ARS" in text.upper():
-                    score += 1
-                candidates.append(
-                    {
-                        "value": str(parsed["decimal"]),
-                        "raw": match.group(0).strip(),
-                        "display": parsed["display"],
-                        "currency": "ARS",
-                        "confidence": line.get("confidence"),
-                        "validation": "found",
-                        "score": score,
-                    }
+                selected = AmountField(
+                    str(parsed["decimal"]),
+                    line.confidence,
+                    "found",
+                    line.box,
+                    amount=parsed["decimal"],
+                    raw=match.group(0).strip(),
+                    display=parsed["display"],
+                    score=score,
                 )
-    if not candidates:
-        return {
-            "value": None,
-            "currency": "ARS",
-            "confidence": None,
-            "validation": "missing",
-        }
-    selected = dict(max(candidates, key=lambda candidate: candidate["score"]))
-    selected.pop("score", None)
-    return selected
+    return selected or AmountField()
 
 
 def extract_payment_date(
-    lines: Sequence[Dict[str, Any]],
+    lines: Sequence[OcrLine],
     *,
     today: date,
-) -> Dict[str, Any]:
-    candidates: List[Dict[str, Any]] = []
+) -> DateField:
+    selected: Optional[DateField] = None
     for line in lines:
-        text = str(line["text"])
-        normalized_text = normalize_text_for_matching(text)
-        for match in SPANISH_DATE_PATTERN.finditer(normalized_text):
-            candidate = build_date_candidate(
-                day=int(match.group(1)),
-                month=MONTH_MAP.get(match.group(2).lower()),
-                year_value=match.group(3),
-                time_value=match.group(4),
-                raw=match.group(0),
-                line=line,
-                today=today,
-                score=3,
-            )
-            if candidate:
-                candidates.append(candidate)
-        for match in DISPLAYED_DATE_PATTERN.finditer(normalized_text):
-            candidate = build_date_candidate(
-                day=int(match.group(1)),
-                month=MONTH_MAP.get(match.group(2).lower()),
-                year_value=match.group(3),
-                time_value=match.group(4),
-                raw=match.group(0),
-                line=line,
-                today=today,
-                score=3,
-            )
-            if candidate:
-                candidates.append(candidate)
-        for match in NUMERIC_DATE_PATTERN.finditer(text):
-            candidate = build_date_candidate(
-                day=int(match.group(1)),
-                month=int(match.group(2)),
-                year_value=match.group(3),
-                time_value=match.group(4),
-                raw=match.group(0),
-                line=line,
-                today=today,
-                score=2,
-            )
-            if candidate:
-                candidates.append(candidate)
-    if not candidates:
-        return {
-            "value": None,
-            "datetime": None,
-            "display": None,
-            "confidence": None,
-            "validation": "missing",
-        }
-    selected = dict(max(candidates, key=lambda candidate: candidate["score"]))
-    selected.pop("score", None)
-    return selected
+        if not line.has_digit:
+            continue
+        for pattern, score in (
+            (SPANISH_DATE_PATTERN, 3),
+            (DISPLAYED_DATE_PATTERN, 3),
+            (NUMERIC_DATE_PATTERN, 2),
+        ):
+            numeric = pattern is NUMERIC_DATE_PATTERN
+            for match in pattern.finditer(line.text if numeric else line.normalized):
+                candidate = build_date_candidate(
+                    day=int(match.group(1)),
+                    month=int(match.group(2)) if numeric else MONTH_MAP.get(match.group(2).lower()),
+                    year_value=match.group(3),
+                    time_value=match.group(4),
+                    raw=match.group(0),
+                    line=line,
+                    today=today,
+                    score=score,
+                )
+                if candidate and (selected is None or candidate.score > selected.score):
+                    selected = candidate
+    return selected or DateField()
 
 
 def build_date_candidate(
@@ -500,10 +922,10 @@ def build_date_candidate(
     year_value: Optional[str],
     time_value: Optional[str],
     raw: str,
-    line: Dict[str, Any],
+    line: OcrLine,
     today: date,
     score: int,
-) -> Optional[Dict[str, Any]]:
+) -> Optional[DateField]:
     if month is None:
         return None
     year, year_inferred = parse_year(year_value, today=today, day=day, month=month)
@@ -511,32 +933,33 @@ def build_date_candidate(
         parsed_date = date(year, month, day)
     except ValueError:
         return None
-    parsed_datetime: Optional[datetime] = None
+    moment = datetime(year, month, day)
+    time_found = False
     if time_value:
         try:
             hour, minute = [int(part) for part in time_value.split(":", 1)]
-            parsed_datetime = datetime(year, month, day, hour, minute)
+            moment = datetime(year, month, day, hour, minute)
+            time_found = True
         except ValueError:
-            parsed_datetime = None
-    if re.search(
-        r"\b(?:creada|creado|fecha|operacion|transferencia|pago)\b",
-        normalize_text_for_matching(str(line["text"])),
-    ):
+            pass
+    if line.date_keyword:
         score += 2
     display = parsed_date.strftime("%d/%m/%Y")
     if time_value:
         display = f"{display} - {time_value}"
-    return {
-        "value": parsed_date.isoformat(),
-        "datetime": parsed_datetime.isoformat(timespec="minutes") if parsed_datetime else None,
-        "display": display,
-        "time": time_value,
-        "raw": raw.strip(),
-        "confidence": line.get("confidence"),
-        "validation": "found",
-        "year_inferred": year_inferred,
-        "score": score,
-    }
+    return DateField(
+        parsed_date.isoformat(),
+        line.confidence,
+        "found",
+        line.box,
+        moment=moment,
+        datetime=moment.isoformat(timespec="minutes") if time_found else None,
+        display=display,
+        time=time_value,
+        raw=raw.strip(),
+        year_inferred=year_inferred,
+        score=score,
+    )
 
 
 def parse_amount(value: str) -> Optional[Dict[str, Any]]:
@@ -606,13 +1029,13 @@ def parse_confidence(value: Any) -> Optional[float]:
     return round(confidence / 100, 3)
 
 
-def average_line_confidence(lines: Iterable[Dict[str, Any]]) -> Optional[float]:
+def average_line_confidence(lines: Iterable[OcrLine]) -> Optional[float]:
     values = [
-        float(line["confidence"])
+        float(line.confidence)
         for line in lines
-        if isinstance(line.get("confidence"), (int, float))
+        if isinstance(line.confidence, (int, float))
     ]
-    return round(mean(values), 3) if values else None
+    return round(sum(values) / len(values), 3) if values else None
 
 
 def combine_confidences(*values: Any) -> Optional[float]:
@@ -636,6 +1059,112 @@ def normalize_account_digits(value: str) -> str:
     return re.sub(r"\D", "", str(value or "").translate(translation))
 
 
+def account_checksum_valid(digits: str) -> bool:
+    """Check both BCRA verification digits of a 22-digit CBU or CVU."""
+    if len(digits) != ACCOUNT_NUMBER_LENGTH or not digits.isdigit():
+        return False
+    start = 0
+    for weights in ACCOUNT_BLOCK_WEIGHTS:
+        block = digits[start : start + len(weights)]
+        total = sum(int(digit) * weight for digit, weight in zip(block, weights))
+        if (10 - total % 10) % 10 != int(digits[start + len(weights)]):
+            return False
+        start += len(weights) + 1
+    return True
+
+
+def vote_account(
+    parsed_attempts: Sequence[_ParsedAttempt],
+    selected: AccountField,
+) -> AccountField:
+    """Pick a checksum-valid account from every attempt's 22-digit reading.
+
+    Identical valid readings pool their line confidence and the strongest
+    group wins.  When no single reading passes, each digit position is voted
+    on, weighted by confidence, and the voted number is used if it passes.
+    Otherwise ``selected`` is returned unchanged.
+    """
+    candidates = []
+    for attempt in parsed_attempts:
+        field = attempt.parsed.fields["account"]
+        value = field.value or ""
+        if len(value) == ACCOUNT_NUMBER_LENGTH:
+            confidence = field.confidence
+            weight = float(confidence) if isinstance(confidence, (int, float)) else 0.5
+            candidates.append((value, weight, field, attempt.name))
+    if not candidates:
+        return selected
+
+    support: Dict[str, float] = {}
+    for value, weight, _field, _name in candidates:
+        if account_checksum_valid(value):
+            support[value] = support.get(value, 0.0) + weight
+    if support:
+        winner = max(support, key=lambda value: support[value])
+        if selected.value == winner:
+            return selected
+        value, _weight, field, name = max(
+            (candidate for candidate in candidates if candidate[0] == winner),
+            key=lambda candidate: candidate[1],
+        )
+        field.source_attempt = name
+        return field
+
+    positions: List[Dict[str, float]] = [{} for _ in range(ACCOUNT_NUMBER_LENGTH)]
+    for value, weight, _field, _name in candidates:
+        for position, digit in enumerate(value):
+            positions[position][digit] = positions[position].get(digit, 0.0) + weight
+    voted = "".join(max(votes, key=lambda digit: votes[digit]) for votes in positions)
+    if not account_checksum_valid(voted):
+        return selected
+    total_weight = sum(candidate[1] for candidate in candidates)
+    agreement = mean(votes[digit] for votes, digit in zip(positions, voted)) / total_weight
+    account_type = next(
+        (candidate[2].type for candidate in candidates if candidate[2].type),
+        None,
+    )
+    field = AccountField(
+        voted,
+        round(agreement * max(candidate[1] for candidate in candidates), 3),
+        "valid",
+        type=account_type,
+    )
+    field.source_attempt = "digit_vote"
+    field.votes = len(candidates)
+    return field
+
+
+def index_account(
+    index: Dict[Tuple[int, str], set],
+    value: str,
+) -> None:
+    """Register a 22-digit account under each of its segment keys."""
+    for key in _account_segment_keys(value):
+        index.setdefault(key, set()).add(value)
+
+
+def similar_accounts(
+    index: Dict[Tuple[int, str], set],
+    value: str,
+    max_distance: int = ACCOUNT_MATCH_MAX_DISTANCE,
+) -> List[Tuple[str, int]]:
+    """Known accounts within ``max_distance`` digit substitutions of ``value``.
+
+    Results are ``(account, distance)`` pairs sorted nearest first; an exact
+    match is returned with distance 0.
+    """
+    max_distance = min(max_distance, ACCOUNT_MATCH_MAX_DISTANCE)
+    candidates = set()
+    for key in _account_segment_keys(value):
+        candidates.update(index.get(key, ()))
+    matches = []
+    for candidate in candidates:
+        distance = sum(left != right for left, right in zip(candidate, value))
+        if distance <= max_distance:
+            matches.append((candidate, distance))
+    return sorted(matches, key=lambda match: (match[1], match[0]))
+
+
 def group_account_number(value: str) -> Optional[str]:
     if not value:
         return None
@@ -663,6 +1192,8 @@ def normalize_text_for_matching(text: str) -> str:
 
 
 def strip_accents(value: str) -> str:
+    if value.isascii():
+        return value
     return "".join(
         character
         for character in unicodedata.normalize("NFD", value)
@@ -670,36 +1201,90 @@ def strip_accents(value: str) -> str:
     )
 
 
-def _found_field(value: str, line: Dict[str, Any], source: str) -> Dict[str, Any]:
-    return {
-        "value": value,
-        "confidence": line.get("confidence"),
-        "validation": "found",
-        "source": source,
-    }
+@lru_cache(maxsize=4096)
+def _line_features(text: str) -> Tuple[str, bool, Any, bool, bool, bool]:
+    # OCR passes over the same receipt mostly repeat the same lines, so the
+    # text-only checks are shared across attempts.
+    normalized = normalize_text_for_matching(text)
+    return (
+        normalized,
+        DIGIT_PATTERN.search(text) is not None,
+        ACCOUNT_LABEL_PATTERN.search(text),
+        "$" in text or "§" in text or "ars" in normalized,
+        AMOUNT_KEYWORD_PATTERN.search(normalized) is not None,
+        DATE_KEYWORD_PATTERN.search(normalized) is not None,
+    )
+
+
+def _found_field(value: str, line: OcrLine, source: str) -> PayerField:
+    return PayerField(value, line.confidence, "found", line.box, source=source)
 
 
-def _field_score(field_name: str, field: Dict[str, Any]) -> tuple[float, float]:
-    validation = field.get("validation")
+def _field_score(field_name: str, field: ReceiptField) -> tuple[float, float]:
+    validation = field.validation
     if validation == "missing":
         base = 0.0
     elif field_name == "account" and validation == "valid":
         base = 10.0
+    elif field_name == "account" and validation == "invalid_checksum":
+        base = 4.0
     elif field_name == "account":
         base = 2.0
     else:
         base = 6.0
-    if field_name == "payment_date" and not field.get("year_inferred"):
+    if field_name == "payment_date" and not field.year_inferred:
         base += 1.0
-    confidence = field.get("confidence")
+    confidence = field.confidence
     return base, float(confidence) if isinstance(confidence, (int, float)) else 0.0
 
 
-def _attempt_score(attempt: Dict[str, Any]) -> tuple[int, float, int]:
-    parsed = attempt["parsed"]
-    found = 4 - len(parsed["missing_fields"])
-    confidence = average_line_confidence(attempt.get("lines") or []) or 0.0
-    return found, confidence, len(str(attempt.get("text") or ""))
+def _attempt_score(attempt: _ParsedAttempt) -> tuple[int, float, int]:
+    found = 4 - len(attempt.parsed.missing_fields)
+    confidence = average_line_confidence(attempt.lines) or 0.0
+    return found, confidence, len(attempt.text)
+
+
+def _word_box(
+    ocr_data: Dict[str, Sequence[Any]],
+    index: int,
+) -> Optional[Box]:
+    try:
+        left = int(ocr_data["left"][index])
+        top = int(ocr_data["top"][index])
+        width = int(ocr_data["width"][index])
+        height = int(ocr_data["height"][index])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+    return (left, top, left + width, top + height)
+
+
+def _group_lines(groups: Iterable[List[OcrWord]]) -> List[OcrLine]:
+    lines: List[OcrLine] = []
+    for index, words in enumerate(groups):
+        boxes = [word.box for word in words if word.box is not None]
+        lines.append(
+            OcrLine(
+                index,
+                " ".join(word.text for word in words),
+                round(sum(word.confidence for word in words) / len(words), 3),
+                union_boxes(boxes) if boxes else None,
+                words,
+            )
+        )
+    return lines
+
+
+def _account_segment_keys(value: str) -> List[Tuple[int, str]]:
+    if len(value) != ACCOUNT_NUMBER_LENGTH:
+        return []
+    size, extra = divmod(ACCOUNT_NUMBER_LENGTH, ACCOUNT_INDEX_SEGMENTS)
+    keys = []
+    start = 0
+    for segment in range(ACCOUNT_INDEX_SEGMENTS):
+        end = start + size + (1 if segment < extra else 0)
+        keys.append((segment, value[start:end]))
+        start = end
+    return keys
 
 
 def _sequence_value(values: Sequence[Any], index: int, default: Any) -> Any:
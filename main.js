@@ -666,7 +666,7 @@ const waitForRenderer = async (targetUrl, { timeout = 30000, interval = 250 } =
 }
 
 class PythonBridge {
-  constructor(executablePath, args = []) {
+  constructor(executablePath, args = [], options = {}) {
     this.executablePath = executablePath
     this.args = args
     const resourcesRoot = getResourcesRoot()
@@ -676,12 +676,19 @@ class PythonBridge {
       cwd: resourcesRoot,
       env: {
         ...process.env,
-        ELECTRON_RESOURCES_PATH: resourcesRoot
+        ELECTRON_RESOURCES_PATH: resourcesRoot,
+        PATNAV_OCR_CACHE_DIR:
+          process.env.PATNAV_OCR_CACHE_DIR || path.join(app.getPath('userData'), 'ocr-cache'),
+        PATNAV_UPLOADS_DIR: UPLOADS_DIR,
+        PATNAV_OCR_PREFETCH: process.env.PATNAV_OCR_PREFETCH ?? '1'
       }
     })
     this.buffer = ''
     this.queue = []
     this.current = null
+    this.multiplexed = options.multiplexed !== false
+    this.nextRequestId = 1
+    this.pending = new Map()
     this.exited = false
 
     if (this.process.stdout) {
@@ -710,11 +717,15 @@ class PythonBridge {
     return Boolean(this.process) && !this.exited
   }
 
-  call(cmd, params = []) {
+  call(cmd, params = [], options = {}) {
     if (!this.isRunning()) {
       return Promise.reject(new Error('Python bridge is not running'))
     }
 
+    if (this.multiplexed) {
+      return this._send(cmd, params, options.onEvent)
+    }
+
     return new Promise((resolve, reject) => {
       this.queue.push({ cmd, params, resolve, reject })
       this._flush()
@@ -739,6 +750,22 @@ class PythonBridge {
     }, 1000)
   }
 
+  _send(cmd, params, onEvent) {
+    const id = this.nextRequestId++
+
+    return new Promise((resolve, reject) => {
+      this.pending.set(id, { cmd, resolve, reject, onEvent })
+
+      try {
+        const payload = JSON.stringify({ id, cmd, params })
+        this.process.stdin?.write(`${payload}\n`)
+      } catch (error) {
+        this.pending.delete(id)
+        reject(error)
+      }
+    })
+  }
+
   _flush() {
     if (!this.isRunning() || this.current || this.queue.length === 0) {
       return
@@ -779,6 +806,18 @@ class PythonBridge {
   }
 
   _handleResponse(line) {
+    let parsed
+    try {
+      parsed = JSON.parse(line)
+    } catch (error) {
+      parsed = undefined
+    }
+
+    if (parsed && typeof parsed === 'object' && parsed.id !== undefined && this.pending.has(parsed.id)) {
+      this._handleTaggedResponse(parsed)
+      return
+    }
+
     const active = this.current
     this.current = null
 
@@ -788,15 +827,32 @@ class PythonBridge {
     }
 
     try {
-      const parsed = JSON.parse(line)
-      active.resolve(parsed)
-    } catch (error) {
-      active.reject(new Error(`Invalid JSON from python: ${line}`))
+      if (parsed === undefined) {
+        active.reject(new Error(`Invalid JSON from python: ${line}`))
+      } else {
+        active.resolve(parsed)
+      }
     } finally {
       this._flush()
     }
   }
 
+  _handleTaggedResponse(parsed) {
+    const entry = this.pending.get(parsed.id)
+
+    if (parsed.event !== undefined && parsed.result === undefined) {
+      try {
+        entry.onEvent?.(parsed.event)
+      } catch (error) {
+        console.error(`Failed to handle python event for ${entry.cmd}:`, error)
+      }
+      return
+    }
+
+    this.pending.delete(parsed.id)
+    entry.resolve(parsed.result)
+  }
+
   _abort(error) {
     if (this.exited) {
       return
@@ -814,6 +870,11 @@ class PythonBridge {
       pending?.reject(error)
     }
 
+    for (const entry of this.pending.values()) {
+      entry.reject(error)
+    }
+    this.pending.clear()
+
     if (this.process && !this.process.killed) {
       this.process.kill()
     }
@@ -883,7 +944,9 @@ const getPythonBridge = () => {
   }
 
   const bridgeCommand = resolveBridgeCommand()
-  pythonBridge = new PythonBridge(bridgeCommand.executablePath, bridgeCommand.args)
+  pythonBridge = new PythonBridge(bridgeCommand.executablePath, bridgeCommand.args, {
+    multiplexed: process.env.PATNAV_BRIDGE_MULTIPLEX !== '0'
+  })
   return pythonBridge
 }
 
@@ -1542,6 +1605,30 @@ registerPythonHandler('python:analyze_upload_image', 'analyze_upload_image', {
   mapPayload: payload => [payload.filePath]
 })
 
+ipcMain.handle('python:analyze_upload_batch', async (event, payload) => {
+  const safePayload = payload ?? {}
+  const hasFilePaths = Array.isArray(safePayload.filePaths)
+  if (hasFilePaths && safePayload.filePaths.length === 0) {
+    return { error: 'invalid_params', details: 'filePaths must not be empty' }
+  }
+
+  if (!hasFilePaths && !safePayload.directory) {
+    ensureUploadsDir()
+  }
+
+  const source = hasFilePaths ? safePayload.filePaths : safePayload.directory || UPLOADS_DIR
+  const batchId = safePayload.batchId ?? null
+  const sender = event.sender
+
+  return getPythonBridge().call('analyze_upload_batch', [source], {
+    onEvent: batchEvent => {
+      if (!sender.isDestroyed()) {
+        sender.send('python:analyze_upload_batch_event', { batchId, ...batchEvent })
+      }
+    }
+  })
+})
+
 registerPythonHandler('python:process_upload_image', 'process_upload_image', {
   validate: payload => {
     if (!payload?.filePath) {
@@ -1549,7 +1636,30 @@ registerPythonHandler('python:process_upload_image', 'process_upload_image', {
     }
     return undefined
   },
-  mapPayload: payload => [payload.filePath, payload.allowDuplicate === true, payload.analysis]
+  mapPayload: payload => [payload.filePath, payload.allowDuplicate === true, payload.analysisId ?? null]
+})
+
+ipcMain.handle('python:process_upload_images', async (event, payload) => {
+  const safePayload = payload ?? {}
+  const images = safePayload.images
+  if (!Array.isArray(images) || images.some(image => !image?.filePath)) {
+    return { error: 'invalid_params', details: 'images must list a filePath for every image' }
+  }
+
+  const batchId = safePayload.batchId ?? null
+  const sender = event.sender
+  const items = images.map(image => ({
+    image_path: image.filePath,
+    analysis_id: image.analysisId ?? null
+  }))
+
+  return getPythonBridge().call('process_upload_images', [items, safePayload.allowDuplicate === true], {
+    onEvent: batchEvent => {
+      if (!sender.isDestroyed()) {
+        sender.send('python:process_upload_images_event', { batchId, ...batchEvent })
+      }
+    }
+  })
 })
 
 registerPythonHandler('python:mark_upload_processed', 'mark_upload_processed', {
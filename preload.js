@@ -39,8 +39,21 @@ const electronAPI = Object.freeze({
   listUploadImages: () => ipcRenderer.invoke('uploads:list_images'),
   deleteProcessedUploadImages: () => ipcRenderer.invoke('uploads:delete_processed_images'),
   analyzeUploadImage: filePath => ipcRenderer.invoke('python:analyze_upload_image', { filePath }),
-  processUploadImage: (filePath, allowDuplicate = false, analysis = undefined) =>
-    ipcRenderer.invoke('python:process_upload_image', { filePath, allowDuplicate, analysis }),
+  analyzeUploadBatch: (payload = {}) => ipcRenderer.invoke('python:analyze_upload_batch', payload),
+  onAnalyzeUploadBatchEvent: callback => {
+    const listener = (_event, batchEvent) => callback(batchEvent)
+    ipcRenderer.on('python:analyze_upload_batch_event', listener)
+    return () => ipcRenderer.removeListener('python:analyze_upload_batch_event', listener)
+  },
+  processUploadImage: (filePath, allowDuplicate = false, analysisId = undefined) =>
+    ipcRenderer.invoke('python:process_upload_image', { filePath, allowDuplicate, analysisId }),
+  processUploadImages: (images, allowDuplicate = false, batchId = undefined) =>
+    ipcRenderer.invoke('python:process_upload_images', { images, allowDuplicate, batchId }),
+  onProcessUploadImagesEvent: callback => {
+    const listener = (_event, batchEvent) => callback(batchEvent)
+    ipcRenderer.on('python:process_upload_images_event', listener)
+    return () => ipcRenderer.removeListener('python:process_upload_images_event', listener)
+  },
   markUploadProcessed: filePath =>
     ipcRenderer.invoke('python:mark_upload_processed', { filePath }),
   listTransferTable: tableName =>
@@ -1,28 +1,47 @@
-﻿import json
+﻿import hashlib
+import json
 import os
 import re
 import signal
 import shutil
 import sys
+import tempfile
+import threading
+import time
+import uuid
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
+from statistics import median
 from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 import pyodbc
 
 from comprobante_ocr import (
+    account_checksum_valid,
+    decode_canonical,
+    incomplete_fields,
+    index_account,
+    locate_field_regions,
     merge_ocr_attempts,
-    normalize_account_digits,
-    ocr_data_to_lines,
-    parse_amount,
-    parse_mercado_pago_text,
+    receipt_key,
+    similar_accounts,
+    tsv_to_lines,
 )
 
 try:
-    from PIL import Image, ImageOps
+    from PIL import Image, ImageOps, ImageStat
+
+    # analyze_upload_image refuses oversized images through
+    # DecompressionBombError; the warning Pillow emits before that point
+    # would only clutter stderr.
+    warnings.simplefilter("ignore", Image.DecompressionBombWarning)
 except ImportError:
     Image = None  # type: ignore
     ImageOps = None  # type: ignore
+    ImageStat = None  # type: ignore
 
 try:
     import pytesseract
@@ -68,6 +87,17 @@ try:
 except ImportError:
     pytesseract = None  # type: ignore
 
+# OCR passes already run in parallel, so keep every tesseract pass (the CLI or
+# the in-process library) from starting its own OpenMP thread team as well.
+# libgomp reads this when it loads, so it must be set before tesserocr imports.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+try:
+    # Optional libtesseract binding; keeps language data loaded between passes.
+    import tesserocr
+except ImportError:
+    tesserocr = None  # type: ignore
+
 def _env_str(name: str, default: str) -> str:
     value = os.environ.get(name)
     return value if value else default
@@ -101,16 +131,80 @@ SQL_PASS = _env_str("PATNAV_DB_PASS", "navexe1433")
 
 CONNECT_TIMEOUT = _env_int("PATNAV_DB_CONNECT_TIMEOUT", 10)
 
-POOL_SIZE = _env_int("PATNAV_DB_POOL_SIZE", 1)
+POOL_SIZE = _env_int("PATNAV_DB_POOL_SIZE", 4)
+
+POOL_MIN_SIZE = _env_int("PATNAV_DB_POOL_MIN_SIZE", 1)
+
+POOL_ACQUIRE_TIMEOUT_SECONDS = _env_int("PATNAV_DB_POOL_ACQUIRE_TIMEOUT", 15)
+
+POOL_MAX_IDLE_SECONDS = _env_int("PATNAV_DB_POOL_MAX_IDLE", 300)
+
+POOL_MAX_LIFETIME_SECONDS = _env_int("PATNAV_DB_POOL_MAX_LIFETIME", 1800)
+
+POOL_VALIDATE_AFTER_SECONDS = _env_int("PATNAV_DB_POOL_VALIDATE_AFTER", 5)
+
+BRIDGE_WORKERS = _env_int("PATNAV_BRIDGE_WORKERS", 4)
+
+SCHEMA_CACHE_TTL_SECONDS = _env_int("PATNAV_SCHEMA_CACHE_TTL", 3600)
+
+# Other stations edit UsuariosTransferencia too; the account index is
+# reloaded once it is this old.
+KNOWN_ACCOUNTS_TTL_SECONDS = _env_int("PATNAV_KNOWN_ACCOUNTS_TTL", 300)
 
 OCR_LANGUAGE = _env_str("PATNAV_OCR_LANGUAGE", "eng")
 
 OCR_TIMEOUT_SECONDS = _env_int("PATNAV_OCR_TIMEOUT_SECONDS", 12)
 
-OCR_MAX_IMAGE_BYTES = _env_int("PATNAV_OCR_MAX_IMAGE_BYTES", 10 * 1024 * 1024)
+OCR_WORKERS = _env_int("PATNAV_OCR_WORKERS", 0)
+
+# "auto" prefers the in-process tesserocr engine and falls back to spawning
+# tesseract through pytesseract.
+OCR_ENGINE = _env_str("PATNAV_OCR_ENGINE", "auto").lower()
+
+# "adaptive" stops once every field is parsed with enough confidence; "full"
+# always runs every pass.
+OCR_STRATEGY = _env_str("PATNAV_OCR_STRATEGY", "adaptive").lower()
+
+OCR_MIN_FIELD_CONFIDENCE = _env_int("PATNAV_OCR_MIN_FIELD_CONFIDENCE", 60) / 100
 
+OCR_MAX_IMAGE_BYTES = _env_int("PATNAV_OCR_MAX_IMAGE_BYTES", 40 * 1024 * 1024)
+
+# Larger images are downscaled to this many pixels before OCR; only images
+# above OCR_MAX_DECODE_PIXELS are refused outright.
 OCR_MAX_IMAGE_PIXELS = _env_int("PATNAV_OCR_MAX_IMAGE_PIXELS", 20_000_000)
 
+# Pillow only raises above twice Image.MAX_IMAGE_PIXELS, so analyze_upload_image
+# hands it half of this limit.
+OCR_MAX_DECODE_PIXELS = _env_int("PATNAV_OCR_MAX_DECODE_PIXELS", 150_000_000)
+
+# Text line height, in pixels, that the working image is normalized down to.
+OCR_TARGET_TEXT_HEIGHT = _env_int("PATNAV_OCR_TARGET_TEXT_HEIGHT", 48)
+
+# JPEG draft decoding never goes below this width.
+OCR_MIN_WORKING_WIDTH = _env_int("PATNAV_OCR_MIN_WORKING_WIDTH", 1000)
+
+OCR_CACHE_ENABLED = _env_bool("PATNAV_OCR_CACHE", True)
+
+OCR_CACHE_DIR = _env_str(
+    "PATNAV_OCR_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "patnav-ocr-cache"),
+)
+
+OCR_CACHE_MAX_BYTES = _env_int("PATNAV_OCR_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+OCR_BATCH_WORKERS = _env_int("PATNAV_OCR_BATCH_WORKERS", 0)
+
+OCR_PREFETCH_ENABLED = _env_bool("PATNAV_OCR_PREFETCH", False)
+
+OCR_PREFETCH_INTERVAL_SECONDS = _env_int("PATNAV_OCR_PREFETCH_INTERVAL", 5)
+
+# Analyses kept in memory for process_upload_image to pick up by analysis_id.
+ANALYSIS_STORE_SIZE = _env_int("PATNAV_ANALYSIS_STORE_SIZE", 256)
+
+ANALYSIS_STORE_TTL_SECONDS = _env_int("PATNAV_ANALYSIS_STORE_TTL", 1800)
+
+UPLOADS_DIR = _env_str("PATNAV_UPLOADS_DIR", "")
+
 def _build_conn_str() -> str:
     parts = [
         f"DRIVER={{{DRIVER}}};",
@@ -152,57 +246,230 @@ def _execute_call(
     else:
         cursor.execute(call)
 
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used")
+    def __init__(self, conn: pyodbc.Connection) -> None:
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
 class ConnectionPool:
-    def __init__(self, size: int = 1):
-        self._pool: List[pyodbc.Connection] = []
+    """Thread-safe pool bounded by ``max_size`` open connections.
+
+    Idle connections are handed out newest first.  Connections idle longer
+    than ``validate_after`` seconds are pinged before use, and connections
+    past ``max_idle`` or ``max_lifetime`` are closed instead of reused.
+    """
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        min_size: int = POOL_MIN_SIZE,
+        acquire_timeout: float = POOL_ACQUIRE_TIMEOUT_SECONDS,
+        max_idle: float = POOL_MAX_IDLE_SECONDS,
+        max_lifetime: float = POOL_MAX_LIFETIME_SECONDS,
+        validate_after: float = POOL_VALIDATE_AFTER_SECONDS,
+    ):
         self._max_size = max(1, size)
+        self._min_size = min(max(0, min_size), self._max_size)
+        self._acquire_timeout = max(0.0, float(acquire_timeout))
+        self._max_idle = float(max_idle)
+        self._max_lifetime = float(max_lifetime)
+        self._validate_after = float(validate_after)
+        self._idle: List[_PooledConnection] = []
+        self._checked_out: Dict[int, _PooledConnection] = {}
+        self._open_count = 0
+        self._closed = False
+        self._condition = threading.Condition()
     def _create_connection(self) -> pyodbc.Connection:
         return pyodbc.connect(CONNECTION_STRING, timeout=CONNECT_TIMEOUT)
-    def acquire(self) -> pyodbc.Connection:
-        if self._pool:
-            return self._pool.pop()
+    def _is_expired(self, entry: _PooledConnection, now: float) -> bool:
+        if self._max_lifetime > 0 and now - entry.created_at >= self._max_lifetime:
+            return True
+        return self._max_idle > 0 and now - entry.last_used >= self._max_idle
+    def _take_expired_locked(self, now: float) -> List[_PooledConnection]:
+        expired = [entry for entry in self._idle if self._is_expired(entry, now)]
+        if expired:
+            self._idle = [entry for entry in self._idle if entry not in expired]
+            self._open_count -= len(expired)
+            self._condition.notify_all()
+        return expired
+    def _validate(self, conn: pyodbc.Connection) -> bool:
+        cursor: Optional['pyodbc.Cursor'] = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1;")
+            cursor.fetchone()
+            return True
+        except pyodbc.Error:
+            return False
+        finally:
+            _close_cursor(cursor)
+    def _open_entry(self) -> _PooledConnection:
         try:
-            return self._create_connection()
+            return _PooledConnection(self._create_connection())
         except pyodbc.Error as exc:
+            with self._condition:
+                self._open_count -= 1
+                self._condition.notify()
             raise ConnectionAcquireError(str(exc)) from exc
+    def _checkout(
+        self,
+        deadline: float,
+        wait_seconds: float,
+    ) -> Tuple[Optional[_PooledConnection], List[_PooledConnection]]:
+        """Return an idle entry, or ``None`` when a new connection slot was reserved."""
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise ConnectionAcquireError("The connection pool is closed.")
+                now = time.monotonic()
+                expired = self._take_expired_locked(now)
+                if self._idle:
+                    return self._idle.pop(), expired
+                if self._open_count < self._max_size:
+                    self._open_count += 1
+                    return None, expired
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise ConnectionAcquireError(
+                        f"Timed out after {wait_seconds:g}s waiting for a database connection."
+                    )
+                self._condition.wait(remaining)
+    def acquire(self, timeout: Optional[float] = None) -> pyodbc.Connection:
+        wait_seconds = self._acquire_timeout if timeout is None else max(0.0, timeout)
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            entry, expired = self._checkout(deadline, wait_seconds)
+            _close_entries(expired)
+            if entry is None:
+                entry = self._open_entry()
+            elif (
+                time.monotonic() - entry.last_used >= self._validate_after
+                and not self._validate(entry.conn)
+            ):
+                self._forget(entry)
+                continue
+            with self._condition:
+                self._checked_out[id(entry.conn)] = entry
+            return entry.conn
+    def _forget(self, entry: _PooledConnection) -> None:
+        with self._condition:
+            self._open_count -= 1
+            self._condition.notify()
+        _close_entries([entry])
+    def prewarm(self) -> int:
+        opened = 0
+        while True:
+            with self._condition:
+                if self._closed or self._open_count >= self._min_size:
+                    return opened
+                self._open_count += 1
+            try:
+                entry = self._open_entry()
+            except ConnectionAcquireError:
+                return opened
+            with self._condition:
+                self._idle.insert(0, entry)
+                self._condition.notify()
+            opened += 1
     def release(self, conn: Optional[pyodbc.Connection]) -> None:
         if conn is None:
             return
+        with self._condition:
+            entry = self._checked_out.pop(id(conn), None)
+            if entry is not None:
+                entry.last_used = time.monotonic()
+                if not self._closed and not self._is_expired(entry, entry.last_used):
+                    self._idle.append(entry)
+                    self._condition.notify()
+                    return
+                self._open_count -= 1
+                self._condition.notify()
         try:
-            if len(self._pool) < self._max_size:
-                self._pool.append(conn)
-            else:
-                conn.close()
+            conn.close()
         except pyodbc.Error:
             pass
     def discard(self, conn: Optional[pyodbc.Connection]) -> None:
         if conn is None:
             return
+        with self._condition:
+            if self._checked_out.pop(id(conn), None) is not None:
+                self._open_count -= 1
+                self._condition.notify()
         try:
             conn.close()
         except pyodbc.Error:
             pass
     def close(self) -> None:
-        while self._pool:
-            conn = self._pool.pop()
-            try:
-                conn.close()
-            except pyodbc.Error:
-                pass
+        with self._condition:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+            self._open_count -= len(idle)
+            self._condition.notify_all()
+        _close_entries(idle)
+
+def _close_entries(entries: Sequence[_PooledConnection]) -> None:
+    for entry in entries:
+        try:
+            entry.conn.close()
+        except pyodbc.Error:
+            pass
+
+# SQLSTATEs raised when the socket or session is gone rather than by the
+# statement itself; reads that hit one are replayed once on a new connection.
+CONNECTION_ERROR_SQLSTATES = frozenset(
+    {"08001", "08003", "08004", "08007", "08S01", "08S02", "HYT01"}
+)
+
+def _is_connection_error(exc: 'pyodbc.Error') -> bool:
+    sqlstate = str(exc.args[0]) if exc.args else ""
+    return sqlstate in CONNECTION_ERROR_SQLSTATES
+
+# SQL Server error numbers for a duplicate key in a unique index or constraint.
+UNIQUE_VIOLATION_ERRORS = ("(2601)", "(2627)")
+
+def _is_unique_violation(exc: 'pyodbc.Error') -> bool:
+    sqlstate = str(exc.args[0]) if exc.args else ""
+    message = str(exc.args[1]) if len(exc.args) > 1 else ""
+    return sqlstate == "23000" and any(code in message for code in UNIQUE_VIOLATION_ERRORS)
+
+def _execute_read(
+    pool: ConnectionPool,
+    read: Callable[['pyodbc.Cursor'], Dict[str, Any]],
+    idempotent: bool = True,
+) -> Dict[str, Any]:
+    retry = idempotent
+    while True:
+        try:
+            conn = pool.acquire()
+        except ConnectionAcquireError as exc:
+            return {"error": "connection_failed", "details": exc.details}
+        cursor: Optional['pyodbc.Cursor'] = None
+        try:
+            cursor = conn.cursor()
+            return read(cursor)
+        except pyodbc.Error as exc:
+            pool.discard(conn)
+            conn = None
+            if retry and _is_connection_error(exc):
+                retry = False
+                continue
+            return {"error": "db_execute_failed", "details": str(exc)}
+        finally:
+            _close_cursor(cursor)
+            pool.release(conn)
 
 def execute_procedure(
     pool: ConnectionPool,
     call: str,
     params: Sequence[Any] = (),
+    idempotent: bool = False,
 
 ) -> Dict[str, Any]:
-    try:
-        conn = pool.acquire()
-    except ConnectionAcquireError as exc:
-        return {"error": "connection_failed", "details": exc.details}
-    cursor: Optional['pyodbc.Cursor'] = None
-    try:
-        cursor = conn.cursor()
+    def _read(cursor: 'pyodbc.Cursor') -> Dict[str, Any]:
         _execute_call(cursor, call, params)
         while cursor.description is None and cursor.nextset():
             pass
@@ -211,13 +478,8 @@ def execute_procedure(
         columns = [column[0] for column in cursor.description]
         rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
         return {"columns": columns, "rows": rows}
-    except pyodbc.Error as exc:
-        pool.discard(conn)
-        conn = None
-        return {"error": "db_execute_failed", "details": str(exc)}
-    finally:
-        _close_cursor(cursor)
-        pool.release(conn)
+
+    return _execute_read(pool, _read, idempotent=idempotent)
 
 def run_procedure(
     pool: ConnectionPool,
@@ -248,7 +510,12 @@ def run_procedure(
         pool.release(conn)
 
 def get_app_user(pool: ConnectionPool, username: Any) -> Dict[str, Any]:
-    return execute_procedure(pool, "EXEC traer_appUser @userName=?", (username,))
+    return execute_procedure(
+        pool,
+        "EXEC traer_appUser @userName=?",
+        (username,),
+        idempotent=True,
+    )
 
 
 def get_app_users_by_type(pool: ConnectionPool, user_type: Any) -> Dict[str, Any]:
@@ -256,11 +523,12 @@ def get_app_users_by_type(pool: ConnectionPool, user_type: Any) -> Dict[str, Any
         pool,
         "EXEC traer_appUsers_por_tipo @userType=?",
         (user_type,),
+        idempotent=True,
     )
 
 
 def get_clientes(pool: ConnectionPool) -> Dict[str, Any]:
-    return execute_procedure(pool, "{CALL sp_traer_clientes}")
+    return execute_procedure(pool, "{CALL sp_traer_clientes}", idempotent=True)
 
 def update_cliente(
     pool: ConnectionPool,
@@ -280,7 +548,7 @@ def modificar_cobros_impagos(pool: ConnectionPool) -> Dict[str, Any]:
     return run_procedure(pool, "{CALL modificar_cobros_impagos}")
 
 def traer_incongruencias(pool: ConnectionPool) -> Dict[str, Any]:
-    return execute_procedure(pool, "{CALL traer_incongruencias}")
+    return execute_procedure(pool, "{CALL traer_incongruencias}", idempotent=True)
 
 
 def resumen_remitos(pool: ConnectionPool) -> Dict[str, Any]:
@@ -288,13 +556,13 @@ def resumen_remitos(pool: ConnectionPool) -> Dict[str, Any]:
 
 
 def traer_resumen_prestamos(pool: ConnectionPool) -> Dict[str, Any]:
-    return execute_procedure(pool, "{CALL traer_resumen_prestamos}")
+    return execute_procedure(pool, "{CALL traer_resumen_prestamos}", idempotent=True)
 
 def traer_facturas_atrasadas(pool: ConnectionPool) -> Dict[str, Any]:
-    return execute_procedure(pool, "{CALL traer_facturas_atrasadas}")
+    return execute_procedure(pool, "{CALL traer_facturas_atrasadas}", idempotent=True)
 
 def traer_ignorar(pool: ConnectionPool) -> Dict[str, Any]:
-    return execute_procedure(pool, "{CALL traer_ignorar}")
+    return execute_procedure(pool, "{CALL traer_ignorar}", idempotent=True)
 
 
 def traer_movimientos_cliente(
@@ -305,6 +573,7 @@ def traer_movimientos_cliente(
         pool,
         "{CALL traer_movimientos_cliente (?, ?)}",
         (cod_cliente, normalized_subcodigo),
+        idempotent=True,
     )
 
 
@@ -527,11 +796,12 @@ def traer_hoja_de_ruta_por_dia(
         pool,
         "EXEC Traer_hoja_de_ruta_por_dia @dia_recorrido=?",
         (dia_value,),
+        idempotent=True,
     )
 
 
 def traer_hoja_de_ruta(pool: ConnectionPool) -> Dict[str, Any]:
-    return execute_procedure(pool, "EXEC traer_hoja_de_ruta")
+    return execute_procedure(pool, "EXEC traer_hoja_de_ruta", idempotent=True)
 
 def insertar_envases_en_hoja_de_ruta(pool: ConnectionPool) -> Dict[str, Any]:
     return run_procedure(pool, "EXEC InsertarEnvasesEnHojaDeRuta")
@@ -596,6 +866,12 @@ def _autocontrast_image(image: Any) -> Any:
 
 def _scale_image(image: Any, factor: int) -> Any:
     width, height = image.size
+    # Never upscale past the OCR pixel budget; normalized large receipts
+    # already have text big enough for tesseract.
+    while factor > 1 and width * height * factor * factor > OCR_MAX_IMAGE_PIXELS:
+        factor -= 1
+    if factor == 1:
+        return image
     resampling = getattr(getattr(Image, "Resampling", Image), "LANCZOS")
     return image.resize((width * factor, height * factor), resampling)
 
@@ -611,55 +887,752 @@ def _crop_by_ratio(image: Any, left: float, top: float, right: float, bottom: fl
     return image.crop(box)
 
 
-def _build_ocr_attempts(pil_image: Any) -> List[Tuple[str, Any, str]]:
-    base = pil_image.convert("RGB")
-    gray = base.convert("L")
-    scaled = _autocontrast_image(_scale_image(gray, 2))
-    top_region = _crop_by_ratio(base, 0.05, 0.05, 0.70, 0.30).convert("L")
-    account_region = _crop_by_ratio(base, 0.05, 0.33, 0.78, 0.56).convert("L")
+def _estimate_text_height(gray: Any) -> Optional[float]:
+    """Median height of the ink rows in ``gray``, or None when unclear.
 
-    return [
-        ("full_scaled_layout", scaled, "--psm 6"),
-        ("full_default", gray, ""),
-        ("full_scaled_sparse", scaled, "--psm 11"),
-        ("top_scaled", _autocontrast_image(_scale_image(top_region, 3)), "--psm 6"),
-        ("account_scaled", _autocontrast_image(_scale_image(account_region, 3)), "--psm 6"),
-    ]
+    Squeezing a thresholded copy to one column averages every row in C,
+    which gives the horizontal ink profile without touching pixels in Python.
+    """
+    width, height = gray.size
+    if width < 2 or height < 2:
+        return None
+    dark_background = ImageStat.Stat(gray).mean[0] < 128
+    ink = gray.point(
+        (lambda value: 255 if value >= 128 else 0)
+        if dark_background
+        else (lambda value: 255 if value < 128 else 0)
+    )
+    box = getattr(getattr(Image, "Resampling", Image), "BOX")
+    profile = list(ink.resize((1, height), box).getdata())
+    runs: List[int] = []
+    run = 0
+    for value in profile + [0]:
+        if value >= 2:
+            run += 1
+        elif run:
+            runs.append(run)
+            run = 0
+    runs = [length for length in runs if 3 <= length <= height // 5]
+    if len(runs) < 3:
+        return None
+    return float(median(runs))
 
 
-def _read_ocr_attempts(pil_image: Any) -> List[Dict[str, Any]]:
-    attempts: List[Dict[str, Any]] = []
-    errors: List[str] = []
+def _normalize_receipt_image(pil_image: Any) -> Tuple[Any, Dict[str, Any]]:
+    """Decode ``pil_image`` at a size suited to OCR and report what was done.
 
-    for name, image, config in _build_ocr_attempts(pil_image):
+    JPEGs are decoded with draft mode at the smallest libjpeg reduction that
+    keeps ``OCR_MIN_WORKING_WIDTH``; the result is then downscaled so text
+    lines are about ``OCR_TARGET_TEXT_HEIGHT`` pixels tall and the image fits
+    ``OCR_MAX_IMAGE_PIXELS``.  Images are never upscaled here.
+    """
+    started = time.perf_counter()
+    original_size = pil_image.size
+    draft = False
+    if pil_image.format == "JPEG" and original_size[0] >= OCR_MIN_WORKING_WIDTH * 2:
+        ratio = OCR_MIN_WORKING_WIDTH / original_size[0]
+        requested = (OCR_MIN_WORKING_WIDTH, max(1, int(original_size[1] * ratio)))
         try:
-            ocr_data = pytesseract.image_to_data(
-                image,
+            draft = pil_image.draft("L", requested) is not None
+        except (OSError, ValueError):
+            draft = False
+    pil_image.load()
+    decoded_size = pil_image.size
+
+    image = pil_image
+    if image.mode not in {"L", "RGB"}:
+        image = image.convert("RGB")
+    gray = image if image.mode == "L" else image.convert("L")
+    text_height = _estimate_text_height(gray)
+
+    scale = 1.0
+    if text_height is not None and text_height > OCR_TARGET_TEXT_HEIGHT:
+        scale = OCR_TARGET_TEXT_HEIGHT / text_height
+    pixels = decoded_size[0] * decoded_size[1] * scale * scale
+    if pixels > OCR_MAX_IMAGE_PIXELS:
+        scale *= (OCR_MAX_IMAGE_PIXELS / pixels) ** 0.5
+
+    if scale < 0.95:
+        resampling = getattr(getattr(Image, "Resampling", Image), "LANCZOS")
+        size = (
+            max(1, round(decoded_size[0] * scale)),
+            max(1, round(decoded_size[1] * scale)),
+        )
+        image = image.resize(size, resampling, reducing_gap=3.0)
+
+    normalization = {
+        "original_size": list(original_size),
+        "decoded_size": list(decoded_size),
+        "size": list(image.size),
+        "scale": round(image.size[0] / original_size[0], 4),
+        "draft": draft,
+        "text_height": round(text_height, 1) if text_height is not None else None,
+        "duration_ms": _elapsed_ms(started),
+    }
+    return image, normalization
+
+
+class PreprocessCache:
+    """Shares intermediate images between OCR passes and drops them early.
+
+    ``expect`` registers how many consumers will read a key; ``take`` builds
+    the value on first use and forgets it after its last expected read, so
+    each intermediate lives only as long as some pass still needs it.
+    """
+    def __init__(self) -> None:
+        self._values: Dict[str, Any] = {}
+        self._remaining: Dict[str, int] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+    def expect(self, key: str, consumers: int = 1) -> None:
+        with self._lock:
+            self._remaining[key] = self._remaining.get(key, 0) + consumers
+    def take(self, key: str, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        # Builds run outside the shared lock so a slow resize of one key does
+        # not block passes that only need another.
+        with build_lock:
+            with self._lock:
+                value = self._values.get(key)
+            if value is None:
+                value = build()
+                with self._lock:
+                    self._values[key] = value
+        with self._lock:
+            self._remaining[key] = self._remaining.get(key, 1) - 1
+            if self._remaining[key] <= 0:
+                self._values.pop(key, None)
+        return value
+    def release(self, key: str) -> None:
+        """Give up one expected read of ``key`` without taking it."""
+        with self._lock:
+            self._remaining[key] = self._remaining.get(key, 1) - 1
+            if self._remaining[key] <= 0:
+                self._values.pop(key, None)
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._remaining.clear()
+
+
+OcrPassSpec = Tuple[str, Callable[[], Any], str]
+
+
+# Secondary passes only help with the fields printed inside them; in adaptive
+# mode they run only while one of these fields is still incomplete.
+OCR_REGION_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "account_region": ("account",),
+    "amount_region": ("amount",),
+    "top_scaled": ("payer_name", "amount", "payment_date"),
+    "account_scaled": ("account",),
+    "account_refine": ("account",),
+    "amount_refine": ("amount",),
+    "payment_date_refine": ("payment_date",),
+}
+
+# Account passes keep the label letters so the CBU/CVU type is still read.
+ACCOUNT_CHARACTERS = "0123456789CBVUcbvu:"
+
+AMOUNT_CHARACTERS = "0123456789$.,"
+
+# How each pass is read: tesseract page segmentation mode (None keeps the
+# default), character whitelist (None allows everything) and the upscale
+# applied to its crop.  Page passes share one 2x image, so their scale is
+# fixed by OcrPassPlan.
+OCR_PASS_PROFILES: Dict[str, Dict[str, Any]] = {
+    "full_scaled_layout": {"psm": 6, "whitelist": None, "scale": 2},
+    "full_default": {"psm": None, "whitelist": None, "scale": 1},
+    "full_scaled_sparse": {"psm": 11, "whitelist": None, "scale": 2},
+    "account_region": {"psm": 6, "whitelist": ACCOUNT_CHARACTERS, "scale": 3},
+    "amount_region": {"psm": 6, "whitelist": AMOUNT_CHARACTERS, "scale": 2},
+    "top_scaled": {"psm": 6, "whitelist": None, "scale": 3},
+    "account_scaled": {"psm": 6, "whitelist": ACCOUNT_CHARACTERS, "scale": 3},
+    "account_refine": {"psm": 6, "whitelist": ACCOUNT_CHARACTERS, "scale": 3},
+    "amount_refine": {"psm": 7, "whitelist": AMOUNT_CHARACTERS, "scale": 3},
+    "payment_date_refine": {"psm": 7, "whitelist": None, "scale": 3},
+}
+
+
+def _pass_config(name: str) -> str:
+    profile = OCR_PASS_PROFILES[name]
+    parts = []
+    if profile["psm"] is not None:
+        parts.append(f"--psm {profile['psm']}")
+    if profile["whitelist"]:
+        parts.append(f"-c tessedit_char_whitelist={profile['whitelist']}")
+    return " ".join(parts)
+
+# Top of the receipt: payer name, amount and payment date.
+OCR_TOP_CROP = (0.05, 0.05, 0.70, 0.30)
+
+# Fixed-ratio crops used when the first pass did not locate a field's lines.
+OCR_FALLBACK_CROPS: Dict[str, Tuple[str, Tuple[float, float, float, float]]] = {
+    "account": ("account_scaled", (0.05, 0.33, 0.78, 0.56)),
+    "amount": ("top_scaled", OCR_TOP_CROP),
+}
+
+
+class OcrPassPlan:
+    """Lazy OCR pass images for one receipt.
+
+    Nothing is converted until a pass runs: the grayscale image is produced
+    once, crops come from it rather than from the colour source, and the 2x
+    autocontrasted page is shared by both passes that read it.  Region passes
+    are planned from the word boxes of the first page pass.
+    """
+    def __init__(self, pil_image: Any) -> None:
+        self._image = pil_image
+        self.cache = PreprocessCache()
+        # Page area each pass image covers, as (left, top, right, bottom)
+        # ratios, so boxes read from any pass map back onto the page.
+        self.frames: Dict[str, Tuple[float, float, float, float]] = {}
+        self._refined: List[str] = []
+        # "gray" feeds the plain pass, the shared 2x page and, through one
+        # reservation, the region passes planned later.
+        self.cache.expect("gray", 3)
+        self.cache.expect("scaled", 2)
+    def _gray(self) -> Any:
+        if self._image.mode in {"L", "RGB"}:
+            return self._image.convert("L")
+        return self._image.convert("RGB").convert("L")
+    def _scaled(self) -> Any:
+        return _autocontrast_image(_scale_image(self.cache.take("gray", self._gray), 2))
+    def _crop_pass(
+        self,
+        name: str,
+        ratios: Tuple[float, float, float, float],
+    ) -> OcrPassSpec:
+        scale = OCR_PASS_PROFILES[name]["scale"]
+        def build() -> Any:
+            gray = self.cache.take("gray", self._gray)
+            return _autocontrast_image(_scale_image(_crop_by_ratio(gray, *ratios), scale))
+        self.frames[name] = ratios
+        return (name, build, _pass_config(name))
+    def page_passes(self) -> List[OcrPassSpec]:
+        for name in ("full_scaled_layout", "full_default", "full_scaled_sparse"):
+            self.frames[name] = (0.0, 0.0, 1.0, 1.0)
+        return [
+            (
+                "full_scaled_layout",
+                lambda: self.cache.take("scaled", self._scaled),
+                _pass_config("full_scaled_layout"),
+            ),
+            (
+                "full_default",
+                lambda: self.cache.take("gray", self._gray),
+                _pass_config("full_default"),
+            ),
+            (
+                "full_scaled_sparse",
+                lambda: self.cache.take("scaled", self._scaled),
+                _pass_config("full_scaled_sparse"),
+            ),
+        ]
+    def region_passes(self, attempts: Sequence[Dict[str, Any]]) -> List[OcrPassSpec]:
+        layout = next(
+            (
+                attempt
+                for attempt in attempts
+                if attempt.get("image_size") and any(line.box for line in attempt["lines"])
+            ),
+            None,
+        )
+        regions = locate_field_regions(layout["lines"]) if layout else {}
+
+        specs: List[OcrPassSpec] = []
+        for field_name in ("account", "amount"):
+            box = regions.get(field_name)
+            if box is None:
+                specs.append(self._crop_pass(*OCR_FALLBACK_CROPS[field_name]))
+                continue
+            width, height = layout["image_size"]
+            # A full-width band keeps digits that overflow the label line's
+            # box; half the band height of padding absorbs box jitter.
+            padding = max(4, (box[3] - box[1]) // 2)
+            top = max(0, box[1] - padding) / height
+            bottom = min(height, box[3] + padding) / height
+            specs.append(self._crop_pass(f"{field_name}_region", (0.0, top, 1.0, bottom)))
+
+        # top_scaled is the only second read of the payer name and date;
+        # it still runs when the page passes left either of them weak.
+        if all(spec[0] != "top_scaled" for spec in specs):
+            weak = (
+                incomplete_fields(
+                    merge_ocr_attempts(attempts),
+                    min_confidence=OCR_MIN_FIELD_CONFIDENCE,
+                )
+                if attempts
+                else ["payer_name", "payment_date"]
+            )
+            if OCR_STRATEGY != "adaptive" or {"payer_name", "payment_date"} & set(weak):
+                specs.append(self._crop_pass("top_scaled", OCR_TOP_CROP))
+
+        self.cache.expect("gray", len(specs))
+        self.cache.release("gray")
+        return specs
+    def refine_passes(self, attempts: Sequence[Dict[str, Any]]) -> List[OcrPassSpec]:
+        """Re-read only the line behind each weak account, amount or date field."""
+        if not attempts:
+            return []
+        merged = merge_ocr_attempts(attempts)
+        weak = set(incomplete_fields(merged, min_confidence=OCR_MIN_FIELD_CONFIDENCE))
+        by_name = {attempt["name"]: attempt for attempt in attempts}
+
+        specs: List[OcrPassSpec] = []
+        for field_name in ("account", "amount", "payment_date"):
+            field = merged.fields[field_name]
+            source = by_name.get(field.source_attempt)
+            if (
+                field_name not in weak
+                or field_name in self._refined
+                or not field.box
+                or source is None
+                or source["name"] not in self.frames
+            ):
+                continue
+            ratios = _box_to_page_ratios(field.box, source["image_size"], self.frames[source["name"]])
+            self._refined.append(field_name)
+            specs.append(self._crop_pass(f"{field_name}_refine", ratios))
+
+        self.cache.expect("gray", len(specs))
+        return specs
+
+
+def _box_to_page_ratios(
+    box: Sequence[int],
+    image_size: Sequence[int],
+    frame: Tuple[float, float, float, float],
+) -> Tuple[float, float, float, float]:
+    width, height = image_size
+    frame_left, frame_top, frame_right, frame_bottom = frame
+    # Pad by a quarter of the line height so ascenders and descenders that
+    # fall outside tesseract's word boxes are not clipped.
+    padding = max(2, (box[3] - box[1]) // 4)
+    left = max(0, box[0] - padding) / width
+    top = max(0, box[1] - padding) / height
+    right = min(width, box[2] + padding) / width
+    bottom = min(height, box[3] + padding) / height
+    span_x = frame_right - frame_left
+    span_y = frame_bottom - frame_top
+    return (
+        frame_left + left * span_x,
+        frame_top + top * span_y,
+        frame_left + right * span_x,
+        frame_top + bottom * span_y,
+    )
+
+
+def _plan_ocr_stages(specs: List[OcrPassSpec]) -> List[Any]:
+    """Order the page passes and the planned stages ("refine", "regions").
+
+    Adaptive mode tries to fix weak fields by re-reading their lines before
+    paying for the remaining whole-page passes.
+    """
+    if OCR_STRATEGY != "adaptive":
+        return [specs, "regions", "refine"]
+    return [specs[:1], "refine", specs[1:], "regions", "refine"]
+
+
+_OCR_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+_OCR_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_ocr_executor() -> ThreadPoolExecutor:
+    # One shared pool bounds the tesseract processes running at once, even when
+    # several bridge workers analyze receipts concurrently.
+    global _OCR_EXECUTOR
+    with _OCR_EXECUTOR_LOCK:
+        if _OCR_EXECUTOR is None:
+            workers = OCR_WORKERS if OCR_WORKERS > 0 else (os.cpu_count() or 1)
+            _OCR_EXECUTOR = ThreadPoolExecutor(
+                max_workers=max(1, workers),
+                thread_name_prefix="ocr-pass",
+            )
+        return _OCR_EXECUTOR
+
+
+_BACKGROUND_OCR_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def _get_background_ocr_executor() -> ThreadPoolExecutor:
+    # Prefetch passes run one at a time on their own thread so a user's
+    # analysis never queues behind them in the shared pool.
+    global _BACKGROUND_OCR_EXECUTOR
+    with _OCR_EXECUTOR_LOCK:
+        if _BACKGROUND_OCR_EXECUTOR is None:
+            _BACKGROUND_OCR_EXECUTOR = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="ocr-background",
+            )
+        return _BACKGROUND_OCR_EXECUTOR
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+TESSERACT_PSM_PATTERN = re.compile(r"--psm\s+(\d+)")
+
+TESSERACT_VARIABLE_PATTERN = re.compile(r"-c\s+(\w+)=(\S+)")
+
+
+class PytesseractEngine:
+    """Runs each pass as a tesseract subprocess through pytesseract."""
+    name = "pytesseract"
+    def __init__(self) -> None:
+        self.version = str(pytesseract.get_tesseract_version())
+    def image_to_tsv(self, image: Any, config: str) -> str:
+        return pytesseract.image_to_data(
+            image,
+            lang=OCR_LANGUAGE,
+            config=f"--oem 3 {config}".strip(),
+            output_type=pytesseract.Output.STRING,
+            timeout=OCR_TIMEOUT_SECONDS,
+        )
+
+
+class TesserocrEngine:
+    """Runs passes in-process on long-lived libtesseract handles.
+
+    ``PyTessBaseAPI`` is not thread-safe, so each OCR worker thread keeps one
+    handle and language data is loaded once per thread instead of once per
+    pass.  A pass's ``-c`` variables are set on the handle before it runs.
+    """
+    name = "tesserocr"
+    def __init__(self) -> None:
+        tessdata = os.environ.get("TESSDATA_PREFIX")
+        self._path, languages = (
+            tesserocr.get_languages(tessdata) if tessdata else tesserocr.get_languages()
+        )
+        missing = [lang for lang in OCR_LANGUAGE.split("+") if lang not in languages]
+        if missing:
+            raise RuntimeError(f"missing tesseract language data: {', '.join(missing)}")
+        self._local = threading.local()
+        self.version = str(tesserocr.tesseract_version()).split()[1]
+    def _api(self) -> Any:
+        api = getattr(self._local, "api", None)
+        if api is None:
+            api = self._local.api = tesserocr.PyTessBaseAPI(
+                path=self._path,
                 lang=OCR_LANGUAGE,
-                config=f"--oem 3 {config}".strip(),
-                output_type=pytesseract.Output.DICT,
-                timeout=OCR_TIMEOUT_SECONDS,
             )
-        except Exception as exc:
-            errors.append(f"{name}: {exc!r}")
+        return api
+    def image_to_tsv(self, image: Any, config: str) -> str:
+        api = self._api()
+        variables = dict(TESSERACT_VARIABLE_PATTERN.findall(config))
+        # The handle is shared by every pass on this thread, so unrestricted
+        # passes clear the previous pass's whitelist.
+        variables.setdefault("tessedit_char_whitelist", "")
+        for variable, value in variables.items():
+            api.SetVariable(variable, value)
+        psm_match = TESSERACT_PSM_PATTERN.search(config)
+        api.SetPageSegMode(int(psm_match.group(1)) if psm_match else tesserocr.PSM.AUTO)
+        api.SetImage(image)
+        if not api.Recognize(timeout=OCR_TIMEOUT_SECONDS * 1000):
+            raise RuntimeError(
+                f"tesseract did not finish within {OCR_TIMEOUT_SECONDS} seconds"
+            )
+        return api.GetTSVText(0)
+
+
+_OCR_ENGINE: Optional[Any] = None
+
+_OCR_ENGINE_LOCK = threading.Lock()
+
+
+def _get_ocr_engine() -> Optional[Any]:
+    global _OCR_ENGINE
+    with _OCR_ENGINE_LOCK:
+        if _OCR_ENGINE is not None:
+            return _OCR_ENGINE
+        candidates = []
+        if OCR_ENGINE in {"auto", "tesserocr"} and tesserocr is not None:
+            candidates.append(TesserocrEngine)
+        if OCR_ENGINE in {"auto", "pytesseract"} and pytesseract is not None:
+            candidates.append(PytesseractEngine)
+        for engine_class in candidates:
+            try:
+                _OCR_ENGINE = engine_class()
+            except Exception as exc:
+                sys.stderr.write(f"OCR engine {engine_class.name} unavailable: {exc!r}\n")
+                continue
+            break
+        return _OCR_ENGINE
+
+
+def _run_ocr_attempt(name: str, build: Callable[[], Any], config: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        image = build()
+        image_size = list(image.size)
+        tsv = _get_ocr_engine().image_to_tsv(image, config)
+        # Free the pass image as soon as tesseract has read it.
+        del image
+    except Exception as exc:
+        return {"name": name, "error": repr(exc), "duration_ms": _elapsed_ms(started)}
+
+    lines = tsv_to_lines(tsv)
+    text = "\n".join(line.text for line in lines).strip()
+    return {
+        "name": name,
+        "text": text,
+        "lines": lines,
+        "image_size": image_size,
+        "duration_ms": _elapsed_ms(started),
+    }
+
+
+def _read_ocr_attempts(
+    pil_image: Any,
+    background: bool = False,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    executor = _get_background_ocr_executor() if background else _get_ocr_executor()
+    plan = OcrPassPlan(pil_image)
+    try:
+        return _run_ocr_stages(executor, plan)
+    finally:
+        # Drops intermediates that skipped passes never consumed.
+        plan.cache.clear()
+
+
+def _run_ocr_stages(
+    executor: ThreadPoolExecutor,
+    plan: OcrPassPlan,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    # Planned stages are built from the attempts read so far.
+    stages = _plan_ocr_stages(plan.page_passes())
+
+    attempts: List[Dict[str, Any]] = []
+    timings: List[Dict[str, Any]] = []
+    errors: List[str] = []
+    pending_fields: Optional[List[str]] = None
+    for index, stage in enumerate(stages):
+        if stage == "regions":
+            stage = plan.region_passes(attempts)
+        elif stage == "refine":
+            stage = plan.refine_passes(attempts)
+        if not stage:
             continue
+        runnable = stage
+        if pending_fields is not None:
+            # Stop once nothing is left to improve, and skip region passes
+            # whose fields are already settled.
+            runnable = [
+                spec
+                for spec in stage
+                if pending_fields
+                and (
+                    spec[0] not in OCR_REGION_FIELDS
+                    or set(OCR_REGION_FIELDS[spec[0]]) & set(pending_fields)
+                )
+            ]
+        runnable_names = {spec[0] for spec in runnable}
+        for name, _build, _config in stage:
+            if name not in runnable_names:
+                timings.append({"name": name, "status": "skipped", "duration_ms": 0.0})
+
+        futures = [
+            executor.submit(_run_ocr_attempt, name, build, config)
+            for name, build, config in runnable
+        ]
+        for future in futures:
+            result = future.result()
+            name = result["name"]
+            if result.get("error"):
+                errors.append(f"{name}: {result['error']}")
+                status = "error"
+            elif result["text"]:
+                attempts.append(result)
+                status = "ok"
+            else:
+                status = "empty"
+            timings.append({"name": name, "status": status, "duration_ms": result["duration_ms"]})
 
-        lines = ocr_data_to_lines(ocr_data)
-        text = "\n".join(str(line["text"]) for line in lines).strip()
-        if text:
-            attempts.append({"name": name, "text": text, "lines": lines})
+        if OCR_STRATEGY == "adaptive" and attempts and index + 1 < len(stages):
+            pending_fields = incomplete_fields(
+                merge_ocr_attempts(attempts),
+                min_confidence=OCR_MIN_FIELD_CONFIDENCE,
+            )
 
     if attempts:
-        return attempts
+        return attempts, timings
 
     details = "; ".join(errors) if errors else "OCR did not return text"
     raise RuntimeError(details)
 
 
+# Bump when the OCR passes or the parser change in a way that makes stored
+# analyses stale.
+OCR_CACHE_FORMAT = 9
+
+
+class OcrResultCache:
+    """On-disk cache of receipt analyses keyed by image content and OCR setup.
+
+    Each entry is one JSON file; reads refresh its mtime so eviction drops
+    the least recently used entries once the directory exceeds ``max_bytes``.
+    """
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self._directory = directory
+        self._max_bytes = max(0, max_bytes)
+        self._lock = threading.Lock()
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self._directory, f"{key}.json")
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                entry = json.load(handle)
+            os.utime(path, None)
+        except (OSError, ValueError):
+            return None
+        return entry if isinstance(entry, dict) else None
+    def put(self, key: str, analysis: Dict[str, Any]) -> None:
+        if self._max_bytes <= 0:
+            return
+        path = self._entry_path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                json.dump(analysis, handle, default=str)
+            os.replace(temp_path, path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        self._evict()
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            try:
+                with os.scandir(self._directory) as scan:
+                    for item in scan:
+                        if not item.name.endswith(".json"):
+                            continue
+                        try:
+                            stat = item.stat()
+                        except OSError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, item.path))
+                        total += stat.st_size
+            except OSError:
+                return
+            entries.sort()
+            for _mtime, size, path in entries:
+                if total <= self._max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+
+
+OCR_CACHE = OcrResultCache(OCR_CACHE_DIR, OCR_CACHE_MAX_BYTES)
+
+def _file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _ocr_cache_key(content_hash: str, engine: Any) -> str:
+    settings = json.dumps(
+        {
+            "format": OCR_CACHE_FORMAT,
+            "engine": engine.name,
+            "tesseract": engine.version,
+            "language": OCR_LANGUAGE,
+            "strategy": OCR_STRATEGY,
+            "min_field_confidence": OCR_MIN_FIELD_CONFIDENCE,
+            "target_text_height": OCR_TARGET_TEXT_HEIGHT,
+            "max_image_pixels": OCR_MAX_IMAGE_PIXELS,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(f"{content_hash}:{settings}".encode("utf-8")).hexdigest()
+
+
+class ForegroundOcrGate:
+    """Counts OCR runs requested by users so background work can wait for them."""
+    def __init__(self) -> None:
+        self._active = 0
+        self._condition = threading.Condition()
+    def enter(self) -> None:
+        with self._condition:
+            self._active += 1
+    def leave(self) -> None:
+        with self._condition:
+            self._active -= 1
+            if self._active == 0:
+                self._condition.notify_all()
+    def wait_idle(self, timeout: float) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: self._active == 0, timeout)
+
+
+FOREGROUND_OCR = ForegroundOcrGate()
+
+
+class AnalysisStore:
+    """Recent foreground analyses, handed to the renderer as ``analysis_id``.
+
+    ``process_upload_image`` looks the analysis up by id instead of receiving
+    it back over IPC.  Entries expire after ``ttl`` seconds and the least
+    recently used ones are dropped beyond ``max_entries``.
+    """
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self._max_entries = max(0, max_entries)
+        self._ttl = float(ttl)
+        self._entries: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    def put(self, image_path: str, analysis: Dict[str, Any]) -> Optional[str]:
+        if self._max_entries <= 0:
+            return None
+        analysis_id = uuid.uuid4().hex
+        with self._lock:
+            self._entries[analysis_id] = (
+                time.monotonic(),
+                os.path.abspath(image_path),
+                analysis,
+            )
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return analysis_id
+    def get(self, analysis_id: Any, image_path: Any) -> Optional[Dict[str, Any]]:
+        if not analysis_id or not image_path:
+            return None
+        with self._lock:
+            entry = self._entries.get(str(analysis_id))
+            if entry is None:
+                return None
+            if self._ttl > 0 and time.monotonic() - entry[0] >= self._ttl:
+                del self._entries[str(analysis_id)]
+                return None
+            self._entries.move_to_end(str(analysis_id))
+        try:
+            if entry[1] != os.path.abspath(str(image_path)):
+                return None
+        except (TypeError, ValueError):
+            return None
+        return entry[2]
+
+
+ANALYSIS_STORE = AnalysisStore(ANALYSIS_STORE_SIZE, ANALYSIS_STORE_TTL_SECONDS)
+
+
 def analyze_upload_image(
     _pool: ConnectionPool,
     image_path: Any,
-
+    background: bool = False,
 ) -> Dict[str, Any]:
     if not image_path:
         return {"error": "invalid_params", "details": "image_path is required"}
@@ -683,14 +1656,30 @@ def analyze_upload_image(
             "details": f"The image exceeds the {OCR_MAX_IMAGE_BYTES} byte limit",
         }
 
-    if pytesseract is None or Image is None:
+    engine = _get_ocr_engine() if Image is not None else None
+    if engine is None:
         return {
             "error": "ocr_unavailable",
-            "details": "pytesseract and Pillow must be installed to analyze images",
+            "details": "Pillow and tesseract (tesserocr or pytesseract) must be installed to analyze images",
         }
 
     try:
-        Image.MAX_IMAGE_PIXELS = OCR_MAX_IMAGE_PIXELS
+        content_hash = _file_sha256(file_path)
+    except OSError as exc:
+        return {"error": "unreadable_image", "details": repr(exc)}
+
+    cache_key = _ocr_cache_key(content_hash, engine)
+    if OCR_CACHE_ENABLED:
+        cached = OCR_CACHE.get(cache_key)
+        if cached is not None:
+            cached["ocr"]["cache_hit"] = True
+            cached["file"]["path"] = file_path
+            if not background:
+                cached["analysis_id"] = ANALYSIS_STORE.put(file_path, cached)
+            return cached
+
+    try:
+        Image.MAX_IMAGE_PIXELS = OCR_MAX_DECODE_PIXELS // 2
         with Image.open(file_path) as pil_image:
             image_format = pil_image.format
             if image_format not in {"PNG", "JPEG"}:
@@ -698,12 +1687,29 @@ def analyze_upload_image(
                     "error": "unsupported_image_type",
                     "details": "Only PNG and JPG/JPEG receipts are supported",
                 }
-            pil_image.load()
-            attempts = _read_ocr_attempts(pil_image)
+            working_image, normalization = _normalize_receipt_image(pil_image)
+            ocr_started = time.perf_counter()
+            if background:
+                attempts, attempt_timings = _read_ocr_attempts(
+                    working_image, background=True
+                )
+            else:
+                FOREGROUND_OCR.enter()
+                try:
+                    attempts, attempt_timings = _read_ocr_attempts(working_image)
+                finally:
+                    FOREGROUND_OCR.leave()
+            ocr_duration_ms = _elapsed_ms(ocr_started)
+            del working_image
+    except Image.DecompressionBombError:
+        return {
+            "error": "image_too_large",
+            "details": f"The image exceeds the {Image.MAX_IMAGE_PIXELS * 2} pixel limit",
+        }
     except Exception as exc:
         return {"error": "ocr_failed", "details": repr(exc)}
 
-    parsed = merge_ocr_attempts(attempts)
+    parsed = merge_ocr_attempts(attempts).as_dict()
     fields = parsed["fields"]
     account = fields["account"]
     payer = fields["payer_name"]
@@ -718,11 +1724,6 @@ def analyze_upload_image(
             "holder": payer.get("value"),
         }
 
-    try:
-        ocr_version = str(pytesseract.get_tesseract_version())
-    except Exception:
-        ocr_version = None
-
     result = {
         "ok": True,
         "scanner": "mercado_pago_comprobante",
@@ -732,55 +1733,224 @@ def analyze_upload_image(
         "fields": fields,
         "missing_fields": parsed["missing_fields"],
         "warnings": parsed["warnings"],
+        "canonical": parsed["canonical"],
         "text": parsed.get("text", ""),
         "ocr": {
             "engine": "tesseract",
-            "version": ocr_version,
+            "backend": engine.name,
+            "version": engine.version,
             "language": OCR_LANGUAGE,
             "average_confidence": parsed.get("average_confidence"),
             "selected_attempt": parsed.get("ocr_attempt"),
             "attempts": parsed.get("attempts", []),
+            "duration_ms": ocr_duration_ms,
+            "strategy": OCR_STRATEGY if OCR_STRATEGY == "adaptive" else "full",
+            "attempt_timings": attempt_timings,
+            "skipped_attempts": [
+                timing["name"] for timing in attempt_timings if timing["status"] == "skipped"
+            ],
+            "cache_hit": False,
         },
         "file": {
             "path": file_path,
             "size_bytes": file_size,
             "detected_format": image_format,
+            "sha256": content_hash,
+            "normalization": normalization,
         },
     }
+    if OCR_CACHE_ENABLED:
+        OCR_CACHE.put(cache_key, result)
+    if not background:
+        result["analysis_id"] = ANALYSIS_STORE.put(file_path, result)
     return result
 
 
-def mark_upload_processed(image_path: Any) -> Dict[str, Any]:
-    if not image_path:
-        return {"error": "invalid_params", "details": "image_path is required"}
-
-    file_path = str(image_path)
-    if not os.path.isfile(file_path):
-        return {"error": "not_found", "details": f"No file found at {file_path}"}
+UPLOAD_IMAGE_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg"})
 
-    try:
-        os.remove(file_path)
-    except OSError as exc:
-        return {"error": "delete_failed", "details": str(exc)}
+PROCESSED_UPLOAD_PATTERN = re.compile(r"^Procesada_", re.IGNORECASE)
 
-    return {
-        "status": "processed",
-        "file_path": file_path,
-        "file_name": os.path.basename(file_path),
-        "deleted": True,
-    }
 
+def _list_batch_images(source: Any) -> Optional[List[str]]:
+    if isinstance(source, (list, tuple)):
+        return [str(item) for item in source if item]
+    if not source or not os.path.isdir(str(source)):
+        return None
+    directory = str(source)
+    names = sorted(
+        name
+        for name in os.listdir(directory)
+        if os.path.splitext(name)[1].lower() in UPLOAD_IMAGE_EXTENSIONS
+        and not PROCESSED_UPLOAD_PATTERN.match(name)
+    )
+    return [os.path.join(directory, name) for name in names]
 
-def _serialize_transfer_row(columns: Sequence[str], row: Sequence[Any]) -> Dict[str, Any]:
-    result = dict(zip(columns, row))
-    fecha = result.get("fecha")
-    if isinstance(fecha, datetime):
-        result["fecha"] = fecha.isoformat(timespec="seconds")
-        result["fecha_display"] = fecha.strftime("%d/%m/%Y - %H:%M")
-    monto = result.get("monto")
-    if isinstance(monto, Decimal):
-        result["monto"] = str(monto)
-    return result
+
+def analyze_upload_batch(
+    pool: ConnectionPool,
+    source: Any,
+    emit: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Analyze every receipt in a directory (or an explicit list of paths).
+
+    Each finished image is passed to ``emit`` as a ``result`` event in
+    completion order.  Without an emitter (the untagged protocol) the
+    analyses are returned in the summary instead.
+    """
+    image_paths = _list_batch_images(source)
+    if image_paths is None:
+        return {
+            "error": "invalid_params",
+            "details": "analyze_upload_batch expects a directory or a list of image paths",
+        }
+
+    started = time.perf_counter()
+    workers = OCR_BATCH_WORKERS if OCR_BATCH_WORKERS > 0 else (os.cpu_count() or 1)
+    items: List[Optional[Dict[str, Any]]] = [None] * len(image_paths)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(image_paths)
+    # Images run on their own pool; their OCR passes still share the OCR
+    # executor, which keeps the number of tesseract processes bounded.
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(image_paths) or 1)),
+        thread_name_prefix="ocr-batch",
+    ) as executor:
+        futures = {
+            executor.submit(analyze_upload_image, pool, path): index
+            for index, path in enumerate(image_paths)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                analysis = future.result()
+            except Exception as exc:
+                analysis = {"error": "internal_error", "details": repr(exc)}
+            ok = bool(analysis.get("ok"))
+            items[index] = {
+                "path": image_paths[index],
+                "ok": ok,
+                "error": None if ok else analysis.get("error"),
+                "cache_hit": bool(ok and analysis["ocr"].get("cache_hit")),
+            }
+            if emit is not None:
+                emit({
+                    "type": "result",
+                    "index": index,
+                    "total": len(image_paths),
+                    "path": image_paths[index],
+                    "result": analysis,
+                })
+            else:
+                results[index] = analysis
+
+    succeeded = sum(1 for item in items if item and item["ok"])
+    summary: Dict[str, Any] = {
+        "status": "completed",
+        "total": len(image_paths),
+        "succeeded": succeeded,
+        "failed": len(image_paths) - succeeded,
+        "cache_hits": sum(1 for item in items if item and item["cache_hit"]),
+        "duration_ms": _elapsed_ms(started),
+        "items": items,
+    }
+    if emit is None:
+        summary["results"] = results
+    return summary
+
+
+class UploadPrefetcher:
+    """Polls the uploads directory and OCRs new receipts into ``OCR_CACHE``.
+
+    Images are analyzed one at a time, only while no user-requested OCR is
+    running, and only once their size and mtime have stopped changing.  Their
+    passes run on a single background thread, outside the shared OCR pool.
+    """
+    def __init__(self, directory: str, interval: float) -> None:
+        self._directory = directory
+        self._interval = max(1.0, float(interval))
+        self._seen: Dict[str, Tuple[float, int]] = {}
+        self._pending: Dict[str, Tuple[float, int]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run,
+            name="ocr-prefetch",
+            daemon=True,
+        )
+        self._thread.start()
+    def stop(self) -> None:
+        self._stop.set()
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._scan()
+            except Exception as exc:
+                sys.stderr.write(f"OCR prefetch scan failed: {exc!r}\n")
+            self._stop.wait(self._interval)
+    def _scan(self) -> None:
+        image_paths = _list_batch_images(self._directory) or []
+        present = set(image_paths)
+        for stale in [path for path in self._seen if path not in present]:
+            del self._seen[stale]
+        for stale in [path for path in self._pending if path not in present]:
+            del self._pending[stale]
+
+        for path in image_paths:
+            if self._stop.is_set():
+                return
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature = (stat.st_mtime, stat.st_size)
+            if self._seen.get(path) == signature:
+                continue
+            if self._pending.get(path) != signature:
+                # Seen for the first time or still being written; look again
+                # on the next scan.
+                self._pending[path] = signature
+                continue
+            while not FOREGROUND_OCR.wait_idle(self._interval):
+                if self._stop.is_set():
+                    return
+            analyze_upload_image(None, path, background=True)
+            del self._pending[path]
+            self._seen[path] = signature
+
+
+def mark_upload_processed(image_path: Any) -> Dict[str, Any]:
+    if not image_path:
+        return {"error": "invalid_params", "details": "image_path is required"}
+
+    file_path = str(image_path)
+    if not os.path.isfile(file_path):
+        return {"error": "not_found", "details": f"No file found at {file_path}"}
+
+    try:
+        os.remove(file_path)
+    except OSError as exc:
+        return {"error": "delete_failed", "details": str(exc)}
+
+    return {
+        "status": "processed",
+        "file_path": file_path,
+        "file_name": os.path.basename(file_path),
+        "deleted": True,
+    }
+
+
+def _serialize_transfer_row(columns: Sequence[str], row: Sequence[Any]) -> Dict[str, Any]:
+    result = dict(zip(columns, row))
+    fecha = result.get("fecha")
+    if isinstance(fecha, datetime):
+        result["fecha"] = fecha.isoformat(timespec="seconds")
+        result["fecha_display"] = fecha.strftime("%d/%m/%Y - %H:%M")
+    monto = result.get("monto")
+    if isinstance(monto, Decimal):
+        result["monto"] = str(monto)
+    return result
 
 
 def _serialize_db_value(value: Any) -> Any:
@@ -804,17 +1974,66 @@ def _quote_identifier(identifier: str) -> str:
     return "[" + identifier.replace("]", "]]") + "]"
 
 
-def _get_table_columns(cursor: 'pyodbc.Cursor', table_name: str) -> Dict[str, str]:
+def _get_tables_columns(
+    cursor: 'pyodbc.Cursor',
+    table_names: Sequence[str],
+) -> Dict[str, Dict[str, str]]:
+    placeholders = ", ".join("?" for _ in table_names)
     cursor.execute(
-        """
-        SELECT COLUMN_NAME
+        f"""
+        SELECT TABLE_NAME, COLUMN_NAME
         FROM INFORMATION_SCHEMA.COLUMNS
         WHERE TABLE_SCHEMA = 'dbo'
-          AND TABLE_NAME = ?;
+          AND TABLE_NAME IN ({placeholders});
         """,
-        (table_name,),
+        tuple(table_names),
     )
-    return {str(row[0]).lower(): str(row[0]) for row in cursor.fetchall()}
+    columns_by_table: Dict[str, Dict[str, str]] = {
+        table_name.lower(): {} for table_name in table_names
+    }
+    for table_name, column_name in cursor.fetchall():
+        columns = columns_by_table.setdefault(str(table_name).lower(), {})
+        columns[str(column_name).lower()] = str(column_name)
+    return columns_by_table
+
+
+class SchemaCache:
+    """Process-wide cache for SQL generated from INFORMATION_SCHEMA lookups.
+
+    Entries expire after ``ttl`` seconds; ``clear`` backs the
+    ``refresh_schema`` command after a schema change.
+    """
+    def __init__(self, ttl: float) -> None:
+        self._ttl = float(ttl)
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+    def get(
+        self,
+        key: str,
+        cursor: 'pyodbc.Cursor',
+        build: Callable[['pyodbc.Cursor'], Any],
+    ) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and (self._ttl <= 0 or now - entry[0] < self._ttl):
+            return entry[1]
+        value = build(cursor)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+        return value
+    def clear(self) -> int:
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+        return dropped
+
+
+SCHEMA_CACHE = SchemaCache(SCHEMA_CACHE_TTL_SECONDS)
+
+
+def refresh_schema(_pool: ConnectionPool) -> Dict[str, Any]:
+    return {"status": "refreshed", "dropped_entries": SCHEMA_CACHE.clear()}
 
 
 def _pick_column(columns: Dict[str, str], *candidates: str) -> Optional[str]:
@@ -859,6 +2078,90 @@ def _to_int_range_value(value: Any, field_name: str) -> int:
     return parsed
 
 
+def _build_facultad_queries(cursor: 'pyodbc.Cursor') -> Dict[str, str]:
+    columns_by_table = _get_tables_columns(
+        cursor,
+        ("Ventas", "VentasItems", "Cliente", "Item", "CategoriaIva"),
+    )
+    ventas_columns = columns_by_table["ventas"]
+    ventas_items_columns = columns_by_table["ventasitems"]
+    cliente_columns = columns_by_table["cliente"]
+    item_columns = columns_by_table["item"]
+    categoria_iva_columns = columns_by_table["categoriaiva"]
+
+    ventas_tipo = _column_ref("v", ventas_columns, "tipo_comprobante", "tipo_comprobante")
+    ventas_prefijo = _column_ref("v", ventas_columns, "prefijo", "prefijo")
+    ventas_numero = _column_ref("v", ventas_columns, "numero", "numero")
+    ventas_cod_cliente = _column_ref("v", ventas_columns, "cod_cliente", "cod_cliente")
+    cliente_cod_cliente = _column_ref("c", cliente_columns, "cod_cliente", "cod_cliente")
+    cliente_cod_categoria = _column_ref("c", cliente_columns, "cod_categoria", "cod_categoria")
+    categoria_cod_categoria = _column_ref("ci", categoria_iva_columns, "cod_categoria", "cod_categoria")
+
+    ventas_sql = f"""
+        SELECT
+            LTRIM(RTRIM({ventas_tipo})) AS tipo_comprobante,
+            {ventas_prefijo} AS prefijo,
+            {ventas_numero} AS numero,
+            {ventas_cod_cliente} AS cod_cliente,
+            {_select_column("v", ventas_columns, "fecha_operacion", "fecha_operacion", "fecha", "fecha_emision")},
+            {_select_column("v", ventas_columns, "remitos_facturados", "remitos_facturados", "remitos", "remitos_fac")},
+            {_select_column("v", ventas_columns, "cae", "cae", "CAE")},
+            {_select_column("v", ventas_columns, "fecha_vencimiento_cae", "fecha_vencimiento_cae", "fecha_vencimiento_cae", "fecha_vto_cae", "vencimiento_cae")},
+            {_select_column("c", cliente_columns, "razon_social", "razon_social")},
+            {_select_column("c", cliente_columns, "dom_fiscal1", "dom_fiscal1", "dom_fiscal")},
+            {_select_column("c", cliente_columns, "cod_categoria", "cod_categoria")},
+            {_select_column("c", cliente_columns, "cuit", "cuit")},
+            {_select_column("ci", categoria_iva_columns, "categoria", "categoria")}
+        FROM dbo.Ventas AS v
+        LEFT JOIN dbo.Cliente AS c
+            ON {cliente_cod_cliente} = {ventas_cod_cliente}
+        LEFT JOIN dbo.CategoriaIva AS ci
+            ON {categoria_cod_categoria} = {cliente_cod_categoria}
+        WHERE LTRIM(RTRIM({ventas_tipo})) = 'FB'
+          AND {ventas_prefijo} = 7
+          AND {ventas_numero} BETWEEN ? AND ?
+        ORDER BY {ventas_numero};
+    """
+
+    items_tipo = _column_ref("vi", ventas_items_columns, "tipo_comprobante", "tipo_comprobante")
+    items_prefijo = _column_ref("vi", ventas_items_columns, "prefijo", "prefijo")
+    items_numero = _column_ref("vi", ventas_items_columns, "numero", "numero")
+    items_cod_item = _column_ref("vi", ventas_items_columns, "cod_item", "cod_item")
+    item_cod_item = _column_ref("i", item_columns, "cod_item", "cod_item")
+    order_column = _pick_column(ventas_items_columns, "nro_orden", "orden")
+    order_expression = (
+        f", vi.{_quote_identifier(order_column)} AS nro_orden"
+        if order_column
+        else ", CAST(NULL AS int) AS nro_orden"
+    )
+    order_by_expression = (
+        f"vi.{_quote_identifier(order_column)}, "
+        if order_column
+        else ""
+    )
+
+    items_sql = f"""
+        SELECT
+            LTRIM(RTRIM({items_tipo})) AS tipo_comprobante,
+            {items_prefijo} AS prefijo,
+            {items_numero} AS numero
+            {order_expression},
+            {_select_column("vi", ventas_items_columns, "cantidad", "cantidad")},
+            {items_cod_item} AS cod_item,
+            {_select_column("vi", ventas_items_columns, "precio", "precio", "precio_unitario")},
+            {_select_column("vi", ventas_items_columns, "importe", "importe")},
+            {_select_column("i", item_columns, "denominacion", "denominacion", "descripcion")}
+        FROM dbo.VentasItems AS vi
+        LEFT JOIN dbo.Item AS i
+            ON {item_cod_item} = {items_cod_item}
+        WHERE LTRIM(RTRIM({items_tipo})) = 'FB'
+          AND {items_prefijo} = 7
+          AND {items_numero} BETWEEN ? AND ?
+        ORDER BY {items_numero}, {order_by_expression}{items_cod_item};
+    """
+    return {"ventas": ventas_sql, "items": items_sql}
+
+
 def traer_facultad_facturas(
     pool: ConnectionPool,
     desde: Any,
@@ -876,58 +2179,11 @@ def traer_facultad_facturas(
             "details": "desde must be less than or equal to hasta.",
         }
 
-    try:
-        conn = pool.acquire()
-    except ConnectionAcquireError as exc:
-        return {"error": "connection_failed", "details": exc.details}
-
-    cursor: Optional['pyodbc.Cursor'] = None
-    try:
-        cursor = conn.cursor()
+    def _read(cursor: 'pyodbc.Cursor') -> Dict[str, Any]:
         cursor.execute("SET LOCK_TIMEOUT 5000;")
+        queries = SCHEMA_CACHE.get("facultad_facturas", cursor, _build_facultad_queries)
 
-        ventas_columns = _get_table_columns(cursor, "Ventas")
-        ventas_items_columns = _get_table_columns(cursor, "VentasItems")
-        cliente_columns = _get_table_columns(cursor, "Cliente")
-        item_columns = _get_table_columns(cursor, "Item")
-        categoria_iva_columns = _get_table_columns(cursor, "CategoriaIva")
-
-        ventas_tipo = _column_ref("v", ventas_columns, "tipo_comprobante", "tipo_comprobante")
-        ventas_prefijo = _column_ref("v", ventas_columns, "prefijo", "prefijo")
-        ventas_numero = _column_ref("v", ventas_columns, "numero", "numero")
-        ventas_cod_cliente = _column_ref("v", ventas_columns, "cod_cliente", "cod_cliente")
-        cliente_cod_cliente = _column_ref("c", cliente_columns, "cod_cliente", "cod_cliente")
-        cliente_cod_categoria = _column_ref("c", cliente_columns, "cod_categoria", "cod_categoria")
-        categoria_cod_categoria = _column_ref("ci", categoria_iva_columns, "cod_categoria", "cod_categoria")
-
-        cursor.execute(
-            f"""
-            SELECT
-                LTRIM(RTRIM({ventas_tipo})) AS tipo_comprobante,
-                {ventas_prefijo} AS prefijo,
-                {ventas_numero} AS numero,
-                {ventas_cod_cliente} AS cod_cliente,
-                {_select_column("v", ventas_columns, "fecha_operacion", "fecha_operacion", "fecha", "fecha_emision")},
-                {_select_column("v", ventas_columns, "remitos_facturados", "remitos_facturados", "remitos", "remitos_fac")},
-                {_select_column("v", ventas_columns, "cae", "cae", "CAE")},
-                {_select_column("v", ventas_columns, "fecha_vencimiento_cae", "fecha_vencimiento_cae", "fecha_vencimiento_cae", "fecha_vto_cae", "vencimiento_cae")},
-                {_select_column("c", cliente_columns, "razon_social", "razon_social")},
-                {_select_column("c", cliente_columns, "dom_fiscal1", "dom_fiscal1", "dom_fiscal")},
-                {_select_column("c", cliente_columns, "cod_categoria", "cod_categoria")},
-                {_select_column("c", cliente_columns, "cuit", "cuit")},
-                {_select_column("ci", categoria_iva_columns, "categoria", "categoria")}
-            FROM dbo.Ventas AS v
-            LEFT JOIN dbo.Cliente AS c
-                ON {cliente_cod_cliente} = {ventas_cod_cliente}
-            LEFT JOIN dbo.CategoriaIva AS ci
-                ON {categoria_cod_categoria} = {cliente_cod_categoria}
-            WHERE LTRIM(RTRIM({ventas_tipo})) = 'FB'
-              AND {ventas_prefijo} = 7
-              AND {ventas_numero} BETWEEN ? AND ?
-            ORDER BY {ventas_numero};
-            """,
-            (desde_numero, hasta_numero),
-        )
+        cursor.execute(queries["ventas"], (desde_numero, hasta_numero))
         columns = [column[0] for column in cursor.description]
         venta_rows = [
             _serialize_db_row(columns, row)
@@ -936,45 +2192,7 @@ def traer_facultad_facturas(
 
         items_by_key: Dict[Tuple[str, int, int], List[Dict[str, Any]]] = {}
         if venta_rows:
-            items_tipo = _column_ref("vi", ventas_items_columns, "tipo_comprobante", "tipo_comprobante")
-            items_prefijo = _column_ref("vi", ventas_items_columns, "prefijo", "prefijo")
-            items_numero = _column_ref("vi", ventas_items_columns, "numero", "numero")
-            items_cod_item = _column_ref("vi", ventas_items_columns, "cod_item", "cod_item")
-            item_cod_item = _column_ref("i", item_columns, "cod_item", "cod_item")
-            order_column = _pick_column(ventas_items_columns, "nro_orden", "orden")
-            order_expression = (
-                f", vi.{_quote_identifier(order_column)} AS nro_orden"
-                if order_column
-                else ", CAST(NULL AS int) AS nro_orden"
-            )
-            order_by_expression = (
-                f"vi.{_quote_identifier(order_column)}, "
-                if order_column
-                else ""
-            )
-
-            cursor.execute(
-                f"""
-                SELECT
-                    LTRIM(RTRIM({items_tipo})) AS tipo_comprobante,
-                    {items_prefijo} AS prefijo,
-                    {items_numero} AS numero
-                    {order_expression},
-                    {_select_column("vi", ventas_items_columns, "cantidad", "cantidad")},
-                    {items_cod_item} AS cod_item,
-                    {_select_column("vi", ventas_items_columns, "precio", "precio", "precio_unitario")},
-                    {_select_column("vi", ventas_items_columns, "importe", "importe")},
-                    {_select_column("i", item_columns, "denominacion", "denominacion", "descripcion")}
-                FROM dbo.VentasItems AS vi
-                LEFT JOIN dbo.Item AS i
-                    ON {item_cod_item} = {items_cod_item}
-                WHERE LTRIM(RTRIM({items_tipo})) = 'FB'
-                  AND {items_prefijo} = 7
-                  AND {items_numero} BETWEEN ? AND ?
-                ORDER BY {items_numero}, {order_by_expression}{items_cod_item};
-                """,
-                (desde_numero, hasta_numero),
-            )
+            cursor.execute(queries["items"], (desde_numero, hasta_numero))
             item_columns_result = [column[0] for column in cursor.description]
             for row in cursor.fetchall():
                 item = _serialize_db_row(item_columns_result, row)
@@ -1007,15 +2225,89 @@ def traer_facultad_facturas(
             "tipo_comprobante": "FB",
             "prefijo": 7,
         }
+
+    try:
+        return _execute_read(pool, _read)
     except ValueError as exc:
         return {"error": "schema_error", "details": str(exc)}
-    except pyodbc.Error as exc:
-        pool.discard(conn)
-        conn = None
-        return {"error": "db_execute_failed", "details": str(exc)}
-    finally:
-        _close_cursor(cursor)
-        pool.release(conn)
+
+
+class KnownAccountIndex:
+    """In-memory index of every ``UsuariosTransferencia.cvu_cbu``.
+
+    Loaded on first use and kept current by the bridge's own writes, so
+    near-match lookups for misread OCR accounts need no extra queries.
+    Other stations' writes are picked up by reloading after ``ttl`` seconds;
+    ``invalidate`` forces a reload when a write does not say which account
+    changed.
+    """
+    def __init__(self, ttl: float) -> None:
+        self._ttl = float(ttl)
+        self._owners: Optional[Dict[str, Dict[str, Any]]] = None
+        self._index: Dict[Tuple[int, str], set] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+    def ensure_loaded(self, cursor: 'pyodbc.Cursor') -> None:
+        with self._lock:
+            if self._owners is not None and (
+                self._ttl <= 0 or time.monotonic() - self._loaded_at < self._ttl
+            ):
+                return
+        loaded_at = time.monotonic()
+        cursor.execute(
+            """
+            SELECT
+                id_usuario_transferencia,
+                cod_cliente,
+                nro_lugar_entrega,
+                orden,
+                cvu_cbu
+            FROM dbo.UsuariosTransferencia
+            WHERE cvu_cbu IS NOT NULL;
+            """
+        )
+        owners: Dict[str, Dict[str, Any]] = {}
+        index: Dict[Tuple[int, str], set] = {}
+        for owner_id, cod_cliente, nro_lugar, orden, account in cursor.fetchall():
+            account_value = str(account).strip()
+            if account_value in owners:
+                continue
+            owners[account_value] = {
+                "id_usuario_transferencia": owner_id,
+                "cod_cliente": cod_cliente,
+                "nro_lugar_entrega": nro_lugar,
+                "orden": orden,
+            }
+            index_account(index, account_value)
+        with self._lock:
+            self._owners = owners
+            self._index = index
+            self._loaded_at = loaded_at
+    def add(self, account: str, owner: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._owners is None or account in self._owners:
+                return
+            self._owners[account] = dict(owner)
+            index_account(self._index, account)
+    def invalidate(self) -> None:
+        with self._lock:
+            self._owners = None
+            self._index = {}
+    def similar(self, account: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self._owners is None:
+                return []
+            return [
+                {
+                    "cvu_cbu": candidate,
+                    "distance": distance,
+                    **self._owners[candidate],
+                }
+                for candidate, distance in similar_accounts(self._index, account)
+            ]
+
+
+KNOWN_ACCOUNTS = KnownAccountIndex(KNOWN_ACCOUNTS_TTL_SECONDS)
 
 
 TRANSFER_TABLE_QUERIES = {
@@ -1082,14 +2374,7 @@ def list_transfer_table(pool: ConnectionPool, table_name: Any) -> Dict[str, Any]
             "details": "Unknown transfer table.",
         }
 
-    try:
-        conn = pool.acquire()
-    except ConnectionAcquireError as exc:
-        return {"error": "connection_failed", "details": exc.details}
-
-    cursor: Optional['pyodbc.Cursor'] = None
-    try:
-        cursor = conn.cursor()
+    def _read(cursor: 'pyodbc.Cursor') -> Dict[str, Any]:
         cursor.execute("SET LOCK_TIMEOUT 5000;")
         cursor.execute(table_config["list_sql"])
         columns = [column[0] for column in cursor.description]
@@ -1104,13 +2389,8 @@ def list_transfer_table(pool: ConnectionPool, table_name: Any) -> Dict[str, Any]
             "columns": columns,
             "rows": rows,
         }
-    except pyodbc.Error as exc:
-        pool.discard(conn)
-        conn = None
-        return {"error": "db_execute_failed", "details": str(exc)}
-    finally:
-        _close_cursor(cursor)
-        pool.release(conn)
+
+    return _execute_read(pool, _read)
 
 
 def delete_transfer_table_row(
@@ -1146,6 +2426,8 @@ def delete_transfer_table_row(
         cursor.execute(table_config["delete_sql"], (parsed_row_id,))
         deleted_count = cursor.rowcount if cursor.rowcount is not None else 0
         conn.commit()
+        if deleted_count > 0 and table_key == "usuarios_transferencia":
+            KNOWN_ACCOUNTS.invalidate()
         if deleted_count <= 0:
             return {
                 "status": "not_deleted",
@@ -1291,6 +2573,7 @@ def add_usuario_transferencia(
         columns = [column[0] for column in cursor.description]
         inserted = _serialize_db_row(columns, cursor.fetchone())
         conn.commit()
+        KNOWN_ACCOUNTS.add(account_value, inserted)
         return {
             "status": "inserted",
             "row": inserted,
@@ -1309,14 +2592,7 @@ def add_usuario_transferencia(
 
 
 def list_unidentified_transferencias(pool: ConnectionPool) -> Dict[str, Any]:
-    try:
-        conn = pool.acquire()
-    except ConnectionAcquireError as exc:
-        return {"error": "connection_failed", "details": exc.details}
-
-    cursor: Optional['pyodbc.Cursor'] = None
-    try:
-        cursor = conn.cursor()
+    def _read(cursor: 'pyodbc.Cursor') -> Dict[str, Any]:
         cursor.execute("SET LOCK_TIMEOUT 5000;")
         cursor.execute(
             """
@@ -1344,24 +2620,12 @@ def list_unidentified_transferencias(pool: ConnectionPool) -> Dict[str, Any]:
             for row in cursor.fetchall()
         ]
         return {"columns": columns, "rows": rows}
-    except pyodbc.Error as exc:
-        pool.discard(conn)
-        conn = None
-        return {"error": "db_execute_failed", "details": str(exc)}
-    finally:
-        _close_cursor(cursor)
-        pool.release(conn)
 
+    return _execute_read(pool, _read)
 
-def list_identified_transferencias(pool: ConnectionPool) -> Dict[str, Any]:
-    try:
-        conn = pool.acquire()
-    except ConnectionAcquireError as exc:
-        return {"error": "connection_failed", "details": exc.details}
 
-    cursor: Optional['pyodbc.Cursor'] = None
-    try:
-        cursor = conn.cursor()
+def list_identified_transferencias(pool: ConnectionPool) -> Dict[str, Any]:
+    def _read(cursor: 'pyodbc.Cursor') -> Dict[str, Any]:
         cursor.execute("SET LOCK_TIMEOUT 5000;")
         cursor.execute(
             """
@@ -1422,24 +2686,12 @@ def list_identified_transferencias(pool: ConnectionPool) -> Dict[str, Any]:
             for row in cursor.fetchall()
         ]
         return {"columns": columns, "rows": rows}
-    except pyodbc.Error as exc:
-        pool.discard(conn)
-        conn = None
-        return {"error": "db_execute_failed", "details": str(exc)}
-    finally:
-        _close_cursor(cursor)
-        pool.release(conn)
 
+    return _execute_read(pool, _read)
 
-def list_transfer_address_candidates(pool: ConnectionPool) -> Dict[str, Any]:
-    try:
-        conn = pool.acquire()
-    except ConnectionAcquireError as exc:
-        return {"error": "connection_failed", "details": exc.details}
 
-    cursor: Optional['pyodbc.Cursor'] = None
-    try:
-        cursor = conn.cursor()
+def list_transfer_address_candidates(pool: ConnectionPool) -> Dict[str, Any]:
+    def _read(cursor: 'pyodbc.Cursor') -> Dict[str, Any]:
         cursor.execute("SET LOCK_TIMEOUT 5000;")
         cursor.execute(
             """
@@ -1490,13 +2742,8 @@ def list_transfer_address_candidates(pool: ConnectionPool) -> Dict[str, Any]:
             for row in cursor.fetchall()
         ]
         return {"columns": columns, "rows": rows}
-    except pyodbc.Error as exc:
-        pool.discard(conn)
-        conn = None
-        return {"error": "db_execute_failed", "details": str(exc)}
-    finally:
-        _close_cursor(cursor)
-        pool.release(conn)
+
+    return _execute_read(pool, _read)
 
 
 def list_transfer_ventas(
@@ -1514,11 +2761,6 @@ def list_transfer_ventas(
             "details": "cod_cliente and nro_lugar_entrega must be integers.",
         }
 
-    try:
-        conn = pool.acquire()
-    except ConnectionAcquireError as exc:
-        return {"error": "connection_failed", "details": exc.details}
-
     account_value = str(cvu_cbu or "").strip()
 
     location_cte = """
@@ -1553,9 +2795,7 @@ def list_transfer_ventas(
             )
     """
 
-    cursor: Optional['pyodbc.Cursor'] = None
-    try:
-        cursor = conn.cursor()
+    def _read(cursor: 'pyodbc.Cursor') -> Dict[str, Any]:
         cursor.execute("SET LOCK_TIMEOUT 5000;")
         cursor.execute(
             location_cte + """
@@ -1686,13 +2926,8 @@ def list_transfer_ventas(
             "address_columns": address_columns,
             "addresses": addresses,
         }
-    except pyodbc.Error as exc:
-        pool.discard(conn)
-        conn = None
-        return {"error": "db_execute_failed", "details": str(exc)}
-    finally:
-        _close_cursor(cursor)
-        pool.release(conn)
+
+    return _execute_read(pool, _read)
 
 
 def check_cobro_comprobante(
@@ -1717,14 +2952,7 @@ def check_cobro_comprobante(
             "details": "prefijo and numero must be integers.",
         }
 
-    try:
-        conn = pool.acquire()
-    except ConnectionAcquireError as exc:
-        return {"error": "connection_failed", "details": exc.details}
-
-    cursor: Optional['pyodbc.Cursor'] = None
-    try:
-        cursor = conn.cursor()
+    def _read(cursor: 'pyodbc.Cursor') -> Dict[str, Any]:
         cursor.execute("SET LOCK_TIMEOUT 5000;")
         cursor.execute(
             """
@@ -1744,13 +2972,8 @@ def check_cobro_comprobante(
             "prefijo": parsed_prefijo,
             "numero": parsed_numero,
         }
-    except pyodbc.Error as exc:
-        pool.discard(conn)
-        conn = None
-        return {"error": "db_execute_failed", "details": str(exc)}
-    finally:
-        _close_cursor(cursor)
-        pool.release(conn)
+
+    return _execute_read(pool, _read)
 
 
 def _parse_comprobante_parts(
@@ -1776,6 +2999,24 @@ def _decimal_from_any(value: Any, field_name: str) -> Decimal:
         raise ValueError(f"{field_name} must be numeric.") from exc
 
 
+# SQL Server accepts at most 2100 parameters per statement, so the set-based
+# venta statements are split into chunks that stay under that limit.
+VENTA_LOOKUP_CHUNK_SIZE = 500
+
+COBROS_APLICADOS_INSERT_CHUNK_SIZE = 250
+
+VENTA_UPDATE_CHUNK_SIZE = 600
+
+
+def _chunks(items: Sequence[Any], size: int) -> List[Tuple[int, Sequence[Any]]]:
+    return [(start, items[start : start + size]) for start in range(0, len(items), size)]
+
+
+def _values_placeholders(row_count: int, width: int) -> str:
+    row = "(" + ", ".join("?" for _ in range(width)) + ")"
+    return ", ".join(row for _ in range(row_count))
+
+
 def apply_transfer_payment(
     pool: ConnectionPool,
     receipt_comprobante: Any,
@@ -1924,14 +3165,12 @@ def apply_transfer_payment(
                 "details": "El comprobante de cobro ya existe en Cobros.",
             }
 
-        venta_records: List[Dict[str, Any]] = []
-        for tipo, prefijo, numero in selected_keys:
+        ventas_by_ordinal: Dict[int, Any] = {}
+        for chunk_start, chunk in _chunks(selected_keys, VENTA_LOOKUP_CHUNK_SIZE):
             cursor.execute(
-                """
-                SELECT TOP (1)
-                    LTRIM(RTRIM(v.tipo_comprobante)) AS tipo_comprobante,
-                    v.prefijo,
-                    v.numero,
+                f"""
+                SELECT
+                    s.ordinal,
                     v.fecha_vencimiento,
                     v.Mcampo_control,
                     COALESCE((
@@ -1948,14 +3187,25 @@ def apply_transfer_payment(
                           AND ca.prefijo = v.prefijo
                           AND ca.numero = v.numero
                     ), 0) AS importe_aplicado
-                FROM dbo.Ventas AS v WITH (UPDLOCK, HOLDLOCK)
-                WHERE LTRIM(RTRIM(v.tipo_comprobante)) = ?
-                  AND v.prefijo = ?
-                  AND v.numero = ?;
+                FROM (VALUES {_values_placeholders(len(chunk), 4)})
+                    AS s (ordinal, tipo_comprobante, prefijo, numero)
+                INNER JOIN dbo.Ventas AS v WITH (UPDLOCK, HOLDLOCK)
+                    ON LTRIM(RTRIM(v.tipo_comprobante)) = s.tipo_comprobante
+                   AND v.prefijo = s.prefijo
+                   AND v.numero = s.numero;
                 """,
-                (tipo, prefijo, numero),
+                tuple(
+                    value
+                    for offset, key in enumerate(chunk)
+                    for value in (chunk_start + offset, *key)
+                ),
             )
-            row = cursor.fetchone()
+            for row in cursor.fetchall():
+                ventas_by_ordinal.setdefault(int(row.ordinal), row)
+
+        venta_records: List[Dict[str, Any]] = []
+        for ordinal, (tipo, prefijo, numero) in enumerate(selected_keys):
+            row = ventas_by_ordinal.get(ordinal)
             if row is None:
                 conn.rollback()
                 return {
@@ -2026,7 +3276,8 @@ def apply_transfer_payment(
 
         remaining = wire_amount
         applied_rows: List[Dict[str, Any]] = []
-        paid_updates = 0
+        applied_params: List[Tuple[Any, ...]] = []
+        paid_keys: List[Tuple[str, int, int]] = []
         for record in venta_records:
             if remaining <= 0:
                 break
@@ -2034,8 +3285,29 @@ def apply_transfer_payment(
             if apply_amount <= 0:
                 continue
 
+            venta_key = (record["tipo_comprobante"], record["prefijo"], record["numero"])
+            applied_params.append(
+                (receipt_tipo, receipt_prefijo, receipt_numero, *venta_key, apply_amount)
+            )
+            fully_paid = apply_amount >= record["deuda"]
+            if fully_paid:
+                paid_keys.append(venta_key)
+
+            applied_rows.append(
+                {
+                    "tipo_comprobante": record["tipo_comprobante"],
+                    "prefijo": record["prefijo"],
+                    "numero": record["numero"],
+                    "importe_aplicado": str(apply_amount),
+                    "fully_paid": fully_paid,
+                }
+            )
+            remaining -= apply_amount
+
+        for _, chunk in _chunks(applied_params, COBROS_APLICADOS_INSERT_CHUNK_SIZE):
+            row_placeholders = ", ".join("(?, ?, ?, ?, ?, ?, ?, NULL, NULL)" for _ in chunk)
             cursor.execute(
-                """
+                f"""
                 INSERT INTO dbo.CobrosAplicados
                 (
                     tipo_comprobante_cobro,
@@ -2048,47 +3320,27 @@ def apply_transfer_payment(
                     numero_ci,
                     saca_ca
                 )
-                VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL);
+                VALUES {row_placeholders};
                 """,
-                (
-                    receipt_tipo,
-                    receipt_prefijo,
-                    receipt_numero,
-                    record["tipo_comprobante"],
-                    record["prefijo"],
-                    record["numero"],
-                    apply_amount,
-                ),
+                tuple(value for params in chunk for value in params),
             )
 
-            fully_paid = apply_amount >= record["deuda"]
-            if fully_paid:
-                cursor.execute(
-                    """
-                    UPDATE dbo.Ventas
-                    SET Mcampo_control = 'P'
-                    WHERE LTRIM(RTRIM(tipo_comprobante)) = ?
-                      AND prefijo = ?
-                      AND numero = ?;
-                    """,
-                    (
-                        record["tipo_comprobante"],
-                        record["prefijo"],
-                        record["numero"],
-                    ),
-                )
-                paid_updates += cursor.rowcount if cursor.rowcount is not None else 0
-
-            applied_rows.append(
-                {
-                    "tipo_comprobante": record["tipo_comprobante"],
-                    "prefijo": record["prefijo"],
-                    "numero": record["numero"],
-                    "importe_aplicado": str(apply_amount),
-                    "fully_paid": fully_paid,
-                }
+        paid_updates = 0
+        for _, chunk in _chunks(paid_keys, VENTA_UPDATE_CHUNK_SIZE):
+            cursor.execute(
+                f"""
+                UPDATE v
+                SET Mcampo_control = 'P'
+                FROM dbo.Ventas AS v
+                INNER JOIN (VALUES {_values_placeholders(len(chunk), 3)})
+                    AS paid (tipo_comprobante, prefijo, numero)
+                    ON LTRIM(RTRIM(v.tipo_comprobante)) = paid.tipo_comprobante
+                   AND v.prefijo = paid.prefijo
+                   AND v.numero = paid.numero;
+                """,
+                tuple(value for key in chunk for value in key),
             )
-            remaining -= apply_amount
+            paid_updates += cursor.rowcount if cursor.rowcount is not None else 0
 
         if not applied_rows:
             conn.rollback()
@@ -2266,6 +3518,7 @@ def assign_transferencia_account(
         )
         updated_count = cursor.rowcount if cursor.rowcount is not None else 0
         conn.commit()
+        KNOWN_ACCOUNTS.add(account_value, owner)
         return {
             "status": "assigned",
             "updated_transferencias": updated_count,
@@ -2285,162 +3538,241 @@ def assign_transferencia_account(
         pool.release(conn)
 
 
-def _analysis_matches_image_path(analysis: Any, image_path: Any) -> bool:
-    if not isinstance(analysis, dict):
-        return False
-    analysis_file = analysis.get("file")
-    if not isinstance(analysis_file, dict):
-        return False
-    analyzed_path = analysis_file.get("path")
-    if not analyzed_path:
-        return False
-    try:
-        return os.path.abspath(str(analyzed_path)) == os.path.abspath(str(image_path))
-    except (TypeError, ValueError):
-        return False
+def _resolve_known_account(
+    account_value: str,
+) -> Tuple[str, Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Match an OCR account against ``KNOWN_ACCOUNTS``.
 
+    A reading that fails the CBU/CVU checksum is replaced by the single
+    nearest known account, if there is one.  Any other near matches are
+    returned as suggestions for manual assignment.
+    """
+    matches = KNOWN_ACCOUNTS.similar(account_value)
+    if not matches or matches[0]["distance"] == 0:
+        return account_value, None, []
+    nearest = [match for match in matches if match["distance"] == matches[0]["distance"]]
+    if len(nearest) == 1 and not account_checksum_valid(account_value):
+        correction = {
+            "from": account_value,
+            "to": nearest[0]["cvu_cbu"],
+            "distance": nearest[0]["distance"],
+        }
+        return nearest[0]["cvu_cbu"], correction, []
+    return account_value, None, matches
 
-def _first_ocr_text(*values: Any) -> Optional[str]:
-    for value in values:
-        if value is None:
-            continue
-        text = str(value).strip()
-        if text:
-            return text
-    return None
 
+def _confirm_account_correction(
+    account_value: str,
+    correction: Optional[Dict[str, Any]],
+    owners: Dict[str, Dict[str, Any]],
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    # The index can lag behind other stations; a correction only stands if
+    # its target is still mapped in UsuariosTransferencia.
+    if correction and correction["to"] not in owners:
+        return correction["from"], None
+    return account_value, correction
 
-def _ocr_account_value(analysis: Dict[str, Any], account: Dict[str, Any]) -> Optional[str]:
-    match = analysis.get("match") if isinstance(analysis.get("match"), dict) else {}
-    for raw_value in (
-        account.get("value"),
-        account.get("formatted"),
-        match.get("number"),
-    ):
-        digits = normalize_account_digits(str(raw_value or ""))
-        if len(digits) >= 22:
-            return digits[:22]
-    return None
 
+def _fetch_duplicate_transfers(
+    cursor: 'pyodbc.Cursor',
+    condition: str,
+    values: Sequence[Any],
+) -> List[Dict[str, Any]]:
+    cursor.execute(
+        f"""
+        SELECT
+            t.id_transferencia,
+            t.cvu_cbu,
+            t.monto,
+            t.fecha,
+            t.nombre_asociado,
+            t.estado,
+            t.id_usuario_transferencia,
+            t.clave_comprobante,
+            u.cod_cliente,
+            u.nro_lugar_entrega,
+            u.orden
+        FROM dbo.Transferencias AS t
+        INNER JOIN dbo.UsuariosTransferencia AS u
+            ON u.id_usuario_transferencia = t.id_usuario_transferencia
+        WHERE {condition}
+        ORDER BY t.id_transferencia DESC;
+        """,
+        tuple(values),
+    )
+    columns = [column[0] for column in cursor.description]
+    return [_serialize_transfer_row(columns, row) for row in cursor.fetchall()]
 
-def _ocr_amount_value(analysis: Dict[str, Any], amount: Dict[str, Any]) -> Optional[Decimal]:
-    for raw_value in (
-        amount.get("value"),
-        analysis.get("amount"),
-        amount.get("display"),
-        amount.get("raw"),
-    ):
-        text = _first_ocr_text(raw_value)
-        if not text:
-            continue
-        try:
-            parsed_decimal = Decimal(text)
-        except InvalidOperation:
-            amount_text = re.sub(r"(?i)\bARS\b|[$§]", "", text).strip()
-            parsed = parse_amount(amount_text)
-            if parsed is None:
-                continue
-            parsed_decimal = parsed["decimal"]
-        if parsed_decimal > 0:
-            return parsed_decimal.quantize(Decimal("0.01"))
-    return None
 
+# SQL Server accepts at most 2100 parameters per statement.
+TRANSFER_BATCH_PARAMETERS = 2000
 
-def _parse_ocr_datetime_text(value: Any) -> Optional[datetime]:
-    if isinstance(value, datetime):
-        return value.replace(microsecond=0)
-    if isinstance(value, date):
-        return datetime.combine(value, datetime.min.time())
 
-    raw = _first_ocr_text(value)
-    if not raw:
-        return None
-
-    normalized = (
-        raw.replace("–", "-")
-        .replace("—", "-")
-        .replace(",", " ")
-        .strip()
-    )
-    normalized = re.sub(r"\s*(?:hs?\.?|horas?)\b\.?", "", normalized, flags=re.IGNORECASE)
-    normalized = re.sub(r"\s+", " ", normalized).strip()
-
-    iso_candidate = normalized.replace("Z", "")
-    try:
-        return datetime.fromisoformat(iso_candidate).replace(microsecond=0)
-    except ValueError:
-        pass
+def _fetch_transfers_by_values(
+    cursor: 'pyodbc.Cursor',
+    keys: Sequence[Tuple[str, Decimal, datetime]],
+) -> Dict[Tuple[str, Decimal, datetime], List[Dict[str, Any]]]:
+    """Stored transfers matching any of the (cvu_cbu, monto, fecha) keys."""
+    found: Dict[Tuple[str, Decimal, datetime], List[Dict[str, Any]]] = {}
+    unique_keys = list(dict.fromkeys(keys))
+    for _, chunk in _chunks(unique_keys, TRANSFER_BATCH_PARAMETERS // 3):
+        rows = ", ".join("(?, ?, ?)" for _ in chunk)
+        condition = (
+            "EXISTS (SELECT 1 FROM (VALUES "
+            f"{rows}"
+            ") AS k (cvu_cbu, monto, fecha) "
+            "WHERE k.cvu_cbu = t.cvu_cbu AND k.monto = t.monto AND k.fecha = t.fecha)"
+        )
+        values = [value for key in chunk for value in key]
+        for row in _fetch_duplicate_transfers(cursor, condition, values):
+            key = (
+                row["cvu_cbu"],
+                Decimal(str(row["monto"])).quantize(Decimal("0.01")),
+                datetime.fromisoformat(row["fecha"]),
+            )
+            found.setdefault(key, []).append(row)
+    return found
 
-    for date_format in (
-        "%d/%m/%Y - %H:%M",
-        "%d/%m/%Y %H:%M",
-        "%d/%m/%Y",
-        "%d-%m-%Y - %H:%M",
-        "%d-%m-%Y %H:%M",
-        "%d-%m-%Y",
-        "%d.%m.%Y - %H:%M",
-        "%d.%m.%Y %H:%M",
-        "%d.%m.%Y",
-    ):
-        try:
-            return datetime.strptime(normalized, date_format).replace(microsecond=0)
-        except ValueError:
-            continue
 
-    parsed = parse_mercado_pago_text(normalized)
-    parsed_date = parsed.get("fields", {}).get("payment_date", {})
-    for parsed_value in (parsed_date.get("datetime"), parsed_date.get("value")):
-        if parsed_value and parsed_value != raw:
-            reparsed = _parse_ocr_datetime_text(parsed_value)
-            if reparsed is not None:
-                return reparsed
-    return None
+def _fetch_transfers_by_receipt_key(
+    cursor: 'pyodbc.Cursor',
+    transfer_keys: Sequence[str],
+) -> Dict[str, Dict[str, Any]]:
+    found: Dict[str, Dict[str, Any]] = {}
+    for _, chunk in _chunks(list(dict.fromkeys(transfer_keys)), TRANSFER_BATCH_PARAMETERS):
+        placeholders = ", ".join("?" for _ in chunk)
+        for row in _fetch_duplicate_transfers(
+            cursor, f"t.clave_comprobante IN ({placeholders})", chunk
+        ):
+            found[row["clave_comprobante"]] = row
+    return found
+
+
+def _fetch_transfer_owners(
+    cursor: 'pyodbc.Cursor',
+    accounts: Sequence[str],
+) -> Tuple[Dict[str, Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Owner rows for each account, plus the unidentified-owner placeholder.
 
+    Like the single-receipt lookup, the lowest ``id_usuario_transferencia``
+    wins when an account is mapped more than once.
+    """
+    owners: Dict[str, Dict[str, Any]] = {}
+    placeholder: Optional[Dict[str, Any]] = None
+    for _, chunk in _chunks(list(dict.fromkeys(accounts)), TRANSFER_BATCH_PARAMETERS):
+        placeholders = ", ".join("?" for _ in chunk)
+        cursor.execute(
+            f"""
+            SELECT
+                id_usuario_transferencia,
+                cod_cliente,
+                nro_lugar_entrega,
+                orden,
+                cvu_cbu
+            FROM dbo.UsuariosTransferencia
+            WHERE cvu_cbu IN ({placeholders})
+               OR (
+                    cod_cliente IS NULL
+                    AND nro_lugar_entrega IS NULL
+                    AND cvu_cbu IS NULL
+                    AND orden = 0
+               )
+            ORDER BY id_usuario_transferencia;
+            """,
+            tuple(chunk),
+        )
+        for row in cursor.fetchall():
+            owner = {
+                "id_usuario_transferencia": row[0],
+                "cod_cliente": row[1],
+                "nro_lugar_entrega": row[2],
+                "orden": row[3],
+            }
+            if row[4] is None:
+                if placeholder is None:
+                    placeholder = owner
+            else:
+                owners.setdefault(str(row[4]), owner)
+    return owners, placeholder
+
+
+TRANSFER_INSERT_COLUMNS = """
+    INSERT INTO dbo.Transferencias
+    (
+        cvu_cbu,
+        monto,
+        id_usuario_transferencia,
+        fecha,
+        nombre_asociado,
+        clave_comprobante
+    )
+    OUTPUT
+        INSERTED.id_transferencia,
+        INSERTED.cvu_cbu,
+        INSERTED.monto,
+        INSERTED.fecha,
+        INSERTED.nombre_asociado,
+        INSERTED.estado,
+        INSERTED.id_usuario_transferencia,
+        INSERTED.clave_comprobante
+"""
+
+
+def _insert_transfers(
+    cursor: 'pyodbc.Cursor',
+    rows: Sequence[Tuple[str, Decimal, int, datetime, Optional[str], Optional[str]]],
+) -> List[Dict[str, Any]]:
+    """Insert transfers and return the stored rows in input order.
 
-def _ocr_payment_datetime(
-    analysis: Dict[str, Any],
-    payment_date: Dict[str, Any],
-) -> Optional[datetime]:
-    for raw_value in (
-        payment_date.get("datetime"),
-        payment_date.get("value"),
-        payment_date.get("display"),
-        analysis.get("created"),
-        payment_date.get("raw"),
-    ):
-        parsed = _parse_ocr_datetime_text(raw_value)
-        if parsed is not None:
-            return parsed
-    return None
+    Keyed rows go in multi-row statements and are matched back through
+    ``clave_comprobante``; OUTPUT does not promise the VALUES order.  Rows
+    without a key are inserted one at a time.
+    """
+    inserted: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+    keyed = [index for index, row in enumerate(rows) if row[5] is not None]
+    for _, chunk in _chunks(keyed, TRANSFER_BATCH_PARAMETERS // 6):
+        values = ", ".join("(?, ?, ?, ?, ?, ?)" for _ in chunk)
+        cursor.execute(
+            f"{TRANSFER_INSERT_COLUMNS} VALUES {values};",
+            tuple(value for index in chunk for value in rows[index]),
+        )
+        columns = [column[0] for column in cursor.description]
+        by_key = {}
+        for row in cursor.fetchall():
+            stored = _serialize_transfer_row(columns, row)
+            by_key[stored["clave_comprobante"]] = stored
+        for index in chunk:
+            inserted[index] = by_key[rows[index][5]]
+    for index, row in enumerate(rows):
+        if row[5] is not None:
+            continue
+        cursor.execute(f"{TRANSFER_INSERT_COLUMNS} VALUES (?, ?, ?, ?, ?, ?);", row)
+        columns = [column[0] for column in cursor.description]
+        inserted[index] = _serialize_transfer_row(columns, cursor.fetchone())
+    return [row for row in inserted if row is not None]
 
 
-def process_upload_image(
+def _read_upload_receipt(
     pool: ConnectionPool,
     image_path: Any,
-    allow_duplicate: Any = False,
-    analysis_override: Any = None,
-) -> Dict[str, Any]:
-    if _analysis_matches_image_path(analysis_override, image_path):
-        analysis = analysis_override
-    else:
-        analysis = analyze_upload_image(pool, image_path)
-    if analysis.get("error"):
-        return analysis
-
-    fields = analysis.get("fields") or {}
-    account = fields.get("account") or {}
-    amount = fields.get("amount") or {}
-    payment_date = fields.get("payment_date") or {}
-    payer = fields.get("payer_name") or {}
+    analysis_id: Any,
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """The analysis of an upload and the values to store from it.
 
-    account_value = _ocr_account_value(analysis, account)
-    amount_value = _ocr_amount_value(analysis, amount)
-    transfer_date = _ocr_payment_datetime(analysis, payment_date)
+    When the values are ``None`` the first element is the error result to
+    return for the image.
+    """
+    analysis = ANALYSIS_STORE.get(analysis_id, image_path)
+    if analysis is None:
+        analysis = analyze_upload_image(pool, image_path)
+        if analysis.get("error"):
+            return analysis, None
+    values = decode_canonical(analysis.get("canonical")) or {}
 
     required_values = {
-        "account": account_value,
-        "amount": amount_value,
-        "payment_date": transfer_date,
+        "account": values.get("account"),
+        "amount": values.get("amount"),
+        "payment_date": values.get("payment_datetime"),
     }
     missing = [name for name, value in required_values.items() if not value]
     if missing:
@@ -2459,14 +3791,85 @@ def process_upload_image(
                 f"requeridos: {missing_display}."
             ),
             "missing_fields": missing,
-            "analysis": analysis,
-        }
+            "analysis_id": analysis.get("analysis_id"),
+        }, None
 
-    account_value = str(required_values["account"])
-    amount_value = required_values["amount"]
-    transfer_date = required_values["payment_date"]
+    payer = (analysis.get("fields") or {}).get("payer_name") or {}
     payer_name = payer.get("value")
-    associated_name = str(payer_name).strip()[:160] if payer_name else None
+    return analysis, {
+        "account": str(required_values["account"]),
+        "amount": required_values["amount"],
+        "fecha": required_values["payment_date"],
+        "nombre_asociado": str(payer_name).strip()[:160] if payer_name else None,
+        "image_hash": (analysis.get("file") or {}).get("sha256") or "",
+    }
+
+
+def _duplicate_upload_result(
+    analysis: Dict[str, Any],
+    duplicate_rows: List[Dict[str, Any]],
+    account_correction: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    result = {
+        "status": "duplicate",
+        "analysis_id": analysis.get("analysis_id"),
+        "duplicate": duplicate_rows[0] if duplicate_rows else None,
+        "duplicates": duplicate_rows,
+    }
+    if account_correction:
+        result["account_correction"] = account_correction
+    return result
+
+
+def _stored_upload_result(
+    analysis: Dict[str, Any],
+    inserted: Dict[str, Any],
+    owner: Dict[str, Any],
+    duplicate_override: bool,
+    account_correction: Optional[Dict[str, Any]],
+    account_suggestions: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    inserted.update(
+        {
+            "cod_cliente": owner["cod_cliente"],
+            "nro_lugar_entrega": owner["nro_lugar_entrega"],
+            "orden": owner["orden"],
+        }
+    )
+    result = {
+        "status": "stored",
+        "analysis_id": analysis.get("analysis_id"),
+        "transfer": inserted,
+        "owner": owner,
+        "duplicate_override": duplicate_override,
+    }
+    if account_correction:
+        result["account_correction"] = account_correction
+    if account_suggestions and owner["cod_cliente"] is None:
+        result["account_suggestions"] = account_suggestions
+    return result
+
+
+def _clean_up_stored_upload(result: Dict[str, Any], image_path: Any) -> None:
+    cleanup = mark_upload_processed(image_path)
+    if cleanup.get("error"):
+        result["cleanup_warning"] = cleanup
+    else:
+        result["processed_file"] = cleanup
+
+
+def process_upload_image(
+    pool: ConnectionPool,
+    image_path: Any,
+    allow_duplicate: Any = False,
+    analysis_id: Any = None,
+) -> Dict[str, Any]:
+    analysis, receipt = _read_upload_receipt(pool, image_path, analysis_id)
+    if receipt is None:
+        return analysis
+
+    amount_value = receipt["amount"]
+    transfer_date = receipt["fecha"]
     allow_duplicate_value = bool(allow_duplicate)
 
     try:
@@ -2477,128 +3880,74 @@ def process_upload_image(
     cursor: Optional['pyodbc.Cursor'] = None
     try:
         cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT
-                t.id_transferencia,
-                t.cvu_cbu,
-                t.monto,
-                t.fecha,
-                t.nombre_asociado,
-                t.estado,
-                t.id_usuario_transferencia,
-                u.cod_cliente,
-                u.nro_lugar_entrega,
-                u.orden
-            FROM dbo.Transferencias AS t WITH (UPDLOCK, HOLDLOCK)
-            INNER JOIN dbo.UsuariosTransferencia AS u
-                ON u.id_usuario_transferencia = t.id_usuario_transferencia
-            WHERE t.cvu_cbu = ?
-              AND t.monto = ?
-              AND t.fecha = ?
-            ORDER BY t.id_transferencia DESC;
-            """,
+        KNOWN_ACCOUNTS.ensure_loaded(cursor)
+        account_value, account_correction, account_suggestions = (
+            _resolve_known_account(receipt["account"])
+        )
+        owners, placeholder = _fetch_transfer_owners(
+            cursor, list(dict.fromkeys([receipt["account"], account_value]))
+        )
+        account_value, account_correction = _confirm_account_correction(
+            account_value, account_correction, owners
+        )
+        transfer_key = receipt_key(
+            account_value, amount_value, transfer_date, receipt["image_hash"]
+        )
+        # A plain read: no range lock is held until commit.  Two stations
+        # storing the same image are resolved by the unique receipt key.
+        duplicate_rows = _fetch_duplicate_transfers(
+            cursor,
+            "t.cvu_cbu = ? AND t.monto = ? AND t.fecha = ?",
             (account_value, amount_value, transfer_date),
         )
-        duplicate_columns = [column[0] for column in cursor.description]
-        duplicate_rows = [
-            _serialize_transfer_row(duplicate_columns, row)
-            for row in cursor.fetchall()
-        ]
 
         if duplicate_rows and not allow_duplicate_value:
             conn.rollback()
-            return {
-                "status": "duplicate",
-                "analysis": analysis,
-                "duplicate": duplicate_rows[0],
-                "duplicates": duplicate_rows,
-            }
-
-        cursor.execute(
-            """
-            SELECT TOP (1)
-                id_usuario_transferencia,
-                cod_cliente,
-                nro_lugar_entrega,
-                orden
-            FROM dbo.UsuariosTransferencia
-            WHERE cvu_cbu = ?
-            ORDER BY id_usuario_transferencia;
-            """,
-            (account_value,),
-        )
-        owner_row = cursor.fetchone()
-
-        if owner_row is None:
-            cursor.execute(
-                """
-                SELECT TOP (1)
-                    id_usuario_transferencia,
-                    cod_cliente,
-                    nro_lugar_entrega,
-                    orden
-                FROM dbo.UsuariosTransferencia
-                WHERE cod_cliente IS NULL
-                  AND nro_lugar_entrega IS NULL
-                  AND cvu_cbu IS NULL
-                  AND orden = 0
-                ORDER BY id_usuario_transferencia;
-                """
+            return _duplicate_upload_result(
+                analysis, duplicate_rows, account_correction
             )
-            owner_row = cursor.fetchone()
 
-        if owner_row is None:
+        owner = owners.get(account_value) or placeholder
+
+        if owner is None:
             conn.rollback()
             return {
                 "error": "unidentified_user_missing",
                 "details": "No existe el usuario de transferencias sin identificar.",
-                "analysis": analysis,
+                "analysis_id": analysis.get("analysis_id"),
             }
 
-        owner = {
-            "id_usuario_transferencia": owner_row[0],
-            "cod_cliente": owner_row[1],
-            "nro_lugar_entrega": owner_row[2],
-            "orden": owner_row[3],
-        }
-        cursor.execute(
-            """
-            INSERT INTO dbo.Transferencias
-            (
-                cvu_cbu,
-                monto,
-                id_usuario_transferencia,
-                fecha,
-                nombre_asociado
+        stored_key: Optional[str] = transfer_key
+        if any(row.get("clave_comprobante") == transfer_key for row in duplicate_rows):
+            # An explicit override of this very image: the copy is stored
+            # without the key, which already belongs to the first row.
+            stored_key = None
+        try:
+            inserted = _insert_transfers(
+                cursor,
+                [
+                    (
+                        account_value,
+                        amount_value,
+                        owner["id_usuario_transferencia"],
+                        transfer_date,
+                        receipt["nombre_asociado"],
+                        stored_key,
+                    )
+                ],
+            )[0]
+        except pyodbc.Error as exc:
+            if not _is_unique_violation(exc):
+                raise
+            # Another station stored this receipt after the read above.
+            conn.rollback()
+            duplicate_rows = _fetch_duplicate_transfers(
+                cursor, "t.clave_comprobante = ?", (transfer_key,)
+            )
+            conn.rollback()
+            return _duplicate_upload_result(
+                analysis, duplicate_rows, account_correction
             )
-            OUTPUT
-                INSERTED.id_transferencia,
-                INSERTED.cvu_cbu,
-                INSERTED.monto,
-                INSERTED.fecha,
-                INSERTED.nombre_asociado,
-                INSERTED.estado,
-                INSERTED.id_usuario_transferencia
-            VALUES (?, ?, ?, ?, ?);
-            """,
-            (
-                account_value,
-                amount_value,
-                owner["id_usuario_transferencia"],
-                transfer_date,
-                associated_name,
-            ),
-        )
-        inserted_columns = [column[0] for column in cursor.description]
-        inserted = _serialize_transfer_row(inserted_columns, cursor.fetchone())
-        inserted.update(
-            {
-                "cod_cliente": owner["cod_cliente"],
-                "nro_lugar_entrega": owner["nro_lugar_entrega"],
-                "orden": owner["orden"],
-            }
-        )
         conn.commit()
     except pyodbc.Error as exc:
         try:
@@ -2610,26 +3959,291 @@ def process_upload_image(
         return {
             "error": "db_execute_failed",
             "details": str(exc),
-            "analysis": analysis,
+            "analysis_id": analysis.get("analysis_id"),
         }
     finally:
         _close_cursor(cursor)
         pool.release(conn)
 
-    cleanup = mark_upload_processed(image_path)
-    result = {
-        "status": "stored",
-        "analysis": analysis,
-        "transfer": inserted,
-        "owner": owner,
-        "duplicate_override": bool(duplicate_rows),
-    }
-    if cleanup.get("error"):
-        result["cleanup_warning"] = cleanup
-    else:
-        result["processed_file"] = cleanup
+    result = _stored_upload_result(
+        analysis,
+        inserted,
+        owner,
+        bool(duplicate_rows),
+        account_correction,
+        account_suggestions,
+    )
+    _clean_up_stored_upload(result, image_path)
     return result
 
+
+def _list_process_items(items: Any) -> Optional[List[Tuple[str, Any]]]:
+    if not isinstance(items, (list, tuple)):
+        return None
+    entries = []
+    for item in items:
+        if isinstance(item, dict):
+            path = item.get("image_path")
+            analysis_id = item.get("analysis_id")
+        else:
+            path, analysis_id = item, None
+        if not path:
+            return None
+        entries.append((str(path), analysis_id))
+    return entries
+
+
+def process_upload_images(
+    pool: ConnectionPool,
+    items: Any,
+    allow_duplicate: Any = False,
+    emit: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Store several receipts in one transaction.
+
+    ``items`` lists image paths, or ``{"image_path", "analysis_id"}``
+    objects.  Duplicate detection and owner lookup each run once for the
+    whole batch, every new transfer goes in a multi-row INSERT and files
+    are removed only after the commit.  ``results`` holds one entry per
+    item, in order, shaped like a ``process_upload_image`` response.
+
+    ``emit`` gets a ``progress`` event as each image is read, in completion
+    order, and one more before the transaction starts.
+    """
+    entries = _list_process_items(items)
+    if entries is None:
+        return {
+            "error": "invalid_params",
+            "details": "process_upload_images expects a list of image paths or {image_path, analysis_id} items",
+        }
+
+    started = time.perf_counter()
+    results: List[Optional[Dict[str, Any]]] = [None] * len(entries)
+    prepared: Dict[int, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+    workers = OCR_BATCH_WORKERS if OCR_BATCH_WORKERS > 0 else (os.cpu_count() or 1)
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(entries) or 1)),
+        thread_name_prefix="ocr-batch",
+    ) as executor:
+        futures = {
+            executor.submit(_read_upload_receipt, pool, path, analysis_id): index
+            for index, (path, analysis_id) in enumerate(entries)
+        }
+        for completed, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            try:
+                analysis, receipt = future.result()
+            except Exception as exc:
+                analysis, receipt = {"error": "internal_error", "details": repr(exc)}, None
+            if receipt is None:
+                results[index] = analysis
+            else:
+                prepared[index] = (analysis, receipt)
+            if emit is not None:
+                emit({
+                    "type": "progress",
+                    "stage": "read",
+                    "completed": completed,
+                    "total": len(entries),
+                    "path": entries[index][0],
+                })
+
+    if emit is not None and prepared:
+        emit({
+            "type": "progress",
+            "stage": "store",
+            "completed": len(entries),
+            "total": len(entries),
+            "path": None,
+        })
+
+    if prepared:
+        _store_upload_batch(
+            pool,
+            [
+                (index, analysis, receipt)
+                for index, (analysis, receipt) in sorted(prepared.items())
+            ],
+            bool(allow_duplicate),
+            results,
+        )
+
+    for index, result in enumerate(results):
+        if result is not None and result.get("status") == "stored":
+            _clean_up_stored_upload(result, entries[index][0])
+
+    summary_results = [
+        {"image_path": entries[index][0], **(result or {})}
+        for index, result in enumerate(results)
+    ]
+    stored = sum(1 for result in summary_results if result.get("status") == "stored")
+    duplicates = sum(1 for result in summary_results if result.get("status") == "duplicate")
+    return {
+        "status": "completed",
+        "total": len(entries),
+        "stored": stored,
+        "duplicates": duplicates,
+        "failed": len(entries) - stored - duplicates,
+        "duration_ms": _elapsed_ms(started),
+        "results": summary_results,
+    }
+
+
+def _store_upload_batch(
+    pool: ConnectionPool,
+    batch: List[Tuple[int, Dict[str, Any], Dict[str, Any]]],
+    allow_duplicate: bool,
+    results: List[Optional[Dict[str, Any]]],
+) -> None:
+    try:
+        conn = pool.acquire()
+    except ConnectionAcquireError as exc:
+        for index, _analysis, _receipt in batch:
+            results[index] = {"error": "connection_failed", "details": exc.details}
+        return
+
+    receipts = {index: receipt for index, _analysis, receipt in batch}
+    resolved: Dict[int, Tuple[Tuple[str, Decimal, datetime], str, Any, Any]] = {}
+    cursor: Optional['pyodbc.Cursor'] = None
+    try:
+        cursor = conn.cursor()
+        KNOWN_ACCOUNTS.ensure_loaded(cursor)
+        corrections = {
+            index: _resolve_known_account(receipt["account"])
+            for index, _analysis, receipt in batch
+        }
+        owners, placeholder = _fetch_transfer_owners(
+            cursor,
+            [
+                account
+                for index, _analysis, receipt in batch
+                for account in (receipt["account"], corrections[index][0])
+            ],
+        )
+        for index, _analysis, receipt in batch:
+            account, correction, suggestions = corrections[index]
+            account, correction = _confirm_account_correction(account, correction, owners)
+            value_key = (account, receipt["amount"], receipt["fecha"])
+            transfer_key = receipt_key(
+                account, receipt["amount"], receipt["fecha"], receipt["image_hash"]
+            )
+            resolved[index] = (value_key, transfer_key, correction, suggestions)
+
+        existing = _fetch_transfers_by_values(
+            cursor, [entry[0] for entry in resolved.values()]
+        )
+
+        # Index of the first item in this batch with the same values or key;
+        # later items are duplicates of it unless allow_duplicate is set.
+        first_by_values: Dict[Tuple[str, Decimal, datetime], int] = {}
+        first_by_key: Dict[str, int] = {}
+        batch_duplicates: Dict[int, int] = {}
+        pending: Dict[int, Tuple[Dict[str, Any], Dict[str, Any], Optional[str]]] = {}
+        for index, analysis, receipt in batch:
+            value_key, transfer_key, correction, _suggestions = resolved[index]
+            stored_rows = existing.get(value_key, [])
+            earlier = first_by_values.get(value_key)
+            if (stored_rows or earlier is not None) and not allow_duplicate:
+                if stored_rows:
+                    results[index] = _duplicate_upload_result(analysis, stored_rows, correction)
+                else:
+                    batch_duplicates[index] = earlier
+                continue
+            owner = owners.get(value_key[0]) or placeholder
+            if owner is None:
+                results[index] = {
+                    "error": "unidentified_user_missing",
+                    "details": "No existe el usuario de transferencias sin identificar.",
+                    "analysis_id": analysis.get("analysis_id"),
+                }
+                continue
+            stored_key: Optional[str] = transfer_key
+            if transfer_key in first_by_key or any(
+                row.get("clave_comprobante") == transfer_key for row in stored_rows
+            ):
+                stored_key = None
+            first_by_values.setdefault(value_key, index)
+            first_by_key.setdefault(transfer_key, index)
+            pending[index] = (analysis, owner, stored_key)
+
+        while pending:
+            order = list(pending)
+            rows = []
+            for index in order:
+                account, amount, transfer_date = resolved[index][0]
+                _analysis, owner, stored_key = pending[index]
+                rows.append(
+                    (
+                        account,
+                        amount,
+                        owner["id_usuario_transferencia"],
+                        transfer_date,
+                        receipts[index]["nombre_asociado"],
+                        stored_key,
+                    )
+                )
+            try:
+                inserted = _insert_transfers(cursor, rows)
+                conn.commit()
+            except pyodbc.Error as exc:
+                if not _is_unique_violation(exc):
+                    raise
+                # Another station stored some of these receipts after the
+                # duplicate read; report them and store the rest.
+                conn.rollback()
+                taken = _fetch_transfers_by_receipt_key(
+                    cursor,
+                    [pending[index][2] for index in order if pending[index][2] is not None],
+                )
+                conn.rollback()
+                raced = [index for index in order if pending[index][2] in taken]
+                if not raced:
+                    raise
+                for index in raced:
+                    analysis = pending.pop(index)[0]
+                    results[index] = _duplicate_upload_result(
+                        analysis, [taken[resolved[index][1]]], resolved[index][2]
+                    )
+                continue
+            for index, row in zip(order, inserted):
+                analysis, owner, _stored_key = pending[index]
+                value_key = resolved[index][0]
+                results[index] = _stored_upload_result(
+                    analysis,
+                    row,
+                    owner,
+                    bool(existing.get(value_key)) or first_by_values[value_key] != index,
+                    resolved[index][2],
+                    resolved[index][3],
+                )
+            break
+    except pyodbc.Error as exc:
+        try:
+            conn.rollback()
+        except pyodbc.Error:
+            pass
+        pool.discard(conn)
+        conn = None
+        for index, analysis, _receipt in batch:
+            if results[index] is None:
+                results[index] = {
+                    "error": "db_execute_failed",
+                    "details": str(exc),
+                    "analysis_id": analysis.get("analysis_id"),
+                }
+        return
+    finally:
+        _close_cursor(cursor)
+        pool.release(conn)
+
+    analyses = {index: analysis for index, analysis, _receipt in batch}
+    for index, earlier in batch_duplicates.items():
+        earlier_result = results[earlier] or {}
+        row = earlier_result.get("transfer") or earlier_result.get("duplicate")
+        results[index] = _duplicate_upload_result(
+            analyses[index], [row] if row else [], resolved[index][2]
+        )
+
 def _handle_get_app_user(pool: ConnectionPool, params: Sequence[Any]) -> Dict[str, Any]:
     if len(params) != 1:
         return {"error": "invalid_params", "details": "get_app_user expects exactly 1 parameter"}
@@ -2907,6 +4521,19 @@ def _handle_analyze_upload_image(
     return analyze_upload_image(pool, params[0])
 
 
+def _handle_analyze_upload_batch(
+    pool: ConnectionPool,
+    params: Sequence[Any],
+    emit: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    if len(params) != 1:
+        return {
+            "error": "invalid_params",
+            "details": "analyze_upload_batch expects a directory or a list of image paths",
+        }
+    return analyze_upload_batch(pool, params[0], emit)
+
+
 def _handle_process_upload_image(
     pool: ConnectionPool,
     params: Sequence[Any],
@@ -2914,11 +4541,25 @@ def _handle_process_upload_image(
     if not 1 <= len(params) <= 3:
         return {
             "error": "invalid_params",
-            "details": "process_upload_image expects image_path, optional allow_duplicate and optional analysis",
+            "details": "process_upload_image expects image_path, optional allow_duplicate and optional analysis_id",
         }
     allow_duplicate = params[1] if len(params) >= 2 else False
-    analysis_override = params[2] if len(params) == 3 else None
-    return process_upload_image(pool, params[0], allow_duplicate, analysis_override)
+    analysis_id = params[2] if len(params) == 3 else None
+    return process_upload_image(pool, params[0], allow_duplicate, analysis_id)
+
+
+def _handle_process_upload_images(
+    pool: ConnectionPool,
+    params: Sequence[Any],
+    emit: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    if not 1 <= len(params) <= 2:
+        return {
+            "error": "invalid_params",
+            "details": "process_upload_images expects a list of images and optional allow_duplicate",
+        }
+    allow_duplicate = params[1] if len(params) == 2 else False
+    return process_upload_images(pool, params[0], allow_duplicate, emit)
 
 
 def _handle_mark_upload_processed(
@@ -3067,6 +4708,18 @@ def _handle_traer_facultad_facturas(
     return traer_facultad_facturas(pool, params[0], params[1])
 
 
+def _handle_refresh_schema(
+    pool: ConnectionPool,
+    params: Sequence[Any],
+) -> Dict[str, Any]:
+    if len(params) != 0:
+        return {
+            "error": "invalid_params",
+            "details": "refresh_schema does not accept parameters",
+        }
+    return refresh_schema(pool)
+
+
 COMMAND_HANDLERS: Dict[str, Callable[[ConnectionPool, Sequence[Any]], Dict[str, Any]]] = {
     "get_app_user": _handle_get_app_user,
     "get_app_users": _handle_get_app_users,
@@ -3096,6 +4749,7 @@ COMMAND_HANDLERS: Dict[str, Callable[[ConnectionPool, Sequence[Any]], Dict[str,
     "apply_transfer_payment": _handle_apply_transfer_payment,
     "assign_transferencia_account": _handle_assign_transferencia_account,
     "traer_facultad_facturas": _handle_traer_facultad_facturas,
+    "refresh_schema": _handle_refresh_schema,
     "ingresar_registro_hoja_de_ruta": _handle_ingresar_registro_hoja_de_ruta,
     "traer_hoja_de_ruta_por_dia": _handle_traer_hoja_de_ruta_por_dia,
     "traer_hoja_de_ruta": _handle_traer_hoja_de_ruta,
@@ -3105,6 +4759,19 @@ COMMAND_HANDLERS: Dict[str, Callable[[ConnectionPool, Sequence[Any]], Dict[str,
 
 }
 
+# Handlers that report progress: tagged requests get an ``emit`` callback that
+# writes {"id": ..., "event": ...} lines ahead of the final result.
+STREAMING_COMMAND_HANDLERS: Dict[
+    str,
+    Callable[
+        [ConnectionPool, Sequence[Any], Optional[Callable[[Dict[str, Any]], None]]],
+        Dict[str, Any],
+    ],
+] = {
+    "analyze_upload_batch": _handle_analyze_upload_batch,
+    "process_upload_images": _handle_process_upload_images,
+}
+
 def _normalize_params(raw: Any) -> List[Any]:
     if raw is None:
         return []
@@ -3112,14 +4779,71 @@ def _normalize_params(raw: Any) -> List[Any]:
         return list(raw)
     return [raw]
 
-def _dispatch(pool: ConnectionPool, cmd: str, params: Sequence[Any]) -> Dict[str, Any]:
+def _dispatch(
+    pool: ConnectionPool,
+    cmd: str,
+    params: Sequence[Any],
+    emit: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    streaming_handler = STREAMING_COMMAND_HANDLERS.get(cmd)
+    if streaming_handler is not None:
+        return streaming_handler(pool, params, emit)
     handler = COMMAND_HANDLERS.get(cmd)
     if handler is None:
         return {"error": "unknown command"}
     return handler(pool, params)
 
+class ResponseWriter:
+    """Writes one JSON response per line; shared by the bridge worker threads."""
+    def __init__(self, stream: Any) -> None:
+        self._stream = stream
+        self._lock = threading.Lock()
+    def write(self, payload: Dict[str, Any]) -> None:
+        line = json.dumps(payload, default=str)
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+def _run_tagged_request(
+    writer: ResponseWriter,
+    pool: ConnectionPool,
+    request_id: Any,
+    cmd: Any,
+    params: Sequence[Any],
+) -> None:
+    def emit(event: Dict[str, Any]) -> None:
+        writer.write({"id": request_id, "event": event})
+    try:
+        if not cmd:
+            res = {"error": "missing_command"}
+        else:
+            res = _dispatch(pool, cmd, params, emit)
+    except Exception as exc:
+        res = {"error": "internal_error", "details": repr(exc)}
+    writer.write({"id": request_id, "result": res})
+
 def main() -> None:
-    pool = ConnectionPool(size=POOL_SIZE)
+    pool = ConnectionPool(size=POOL_SIZE, min_size=POOL_MIN_SIZE)
+    threading.Thread(target=pool.prewarm, name="pool-prewarm", daemon=True).start()
+    # Load the OCR engine (and read the tesseract version) once, off the
+    # request path.
+    threading.Thread(target=_get_ocr_engine, name="ocr-engine-init", daemon=True).start()
+    prefetcher: Optional[UploadPrefetcher] = None
+    if (
+        OCR_PREFETCH_ENABLED
+        and OCR_CACHE_ENABLED
+        and UPLOADS_DIR
+        and Image is not None
+    ):
+        prefetcher = UploadPrefetcher(UPLOADS_DIR, OCR_PREFETCH_INTERVAL_SECONDS)
+        prefetcher.start()
+    writer = ResponseWriter(sys.stdout)
+    # Requests tagged with an "id" run on this pool and answer out of order;
+    # untagged requests keep the original one-line-in, one-line-out protocol.
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, BRIDGE_WORKERS),
+        thread_name_prefix="bridge-worker",
+    )
     def _cleanup(*_args: Any) -> None:
         sys.exit(0)
     signal.signal(signal.SIGINT, _cleanup)
@@ -3130,6 +4854,7 @@ def main() -> None:
             if not line:
                 continue
             cmd = None
+            request_id = None
             params: Sequence[Any] = []
             try:
                 payload = json.loads(line)
@@ -3138,6 +4863,7 @@ def main() -> None:
             else:
                 if isinstance(payload, dict):
                     cmd = payload.get("cmd")
+                    request_id = payload.get("id")
                     params = _normalize_params(payload.get("params"))
                 elif isinstance(payload, str):
                     cmd = payload
@@ -3146,18 +4872,22 @@ def main() -> None:
                         "error": "invalid_params",
                         "details": "payload must be an object or string",
                     }
-                    print(json.dumps(res, default=str))
-                    sys.stdout.flush()
+                    writer.write(res)
                     continue
             if cmd == "exit":
                 break
+            if request_id is not None:
+                executor.submit(_run_tagged_request, writer, pool, request_id, cmd, params)
+                continue
             if not cmd:
                 res = {"error": "missing_command"}
             else:
                 res = _dispatch(pool, cmd, params)
-            print(json.dumps(res, default=str))
-            sys.stdout.flush()
+            writer.write(res)
     finally:
+        if prefetcher is not None:
+            prefetcher.stop()
+        executor.shutdown(wait=True)
         pool.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,34 @@
+IF COL_LENGTH(N'dbo.Transferencias', N'clave_comprobante') IS NULL
+BEGIN
+    ALTER TABLE dbo.Transferencias
+    ADD clave_comprobante char(64) NULL;
+END;
+GO
+
+IF NOT EXISTS
+(
+    SELECT 1
+    FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'dbo.Transferencias')
+      AND name = N'UX_Transferencias_ClaveComprobante'
+)
+BEGIN
+    CREATE UNIQUE INDEX UX_Transferencias_ClaveComprobante
+        ON dbo.Transferencias (clave_comprobante)
+        WHERE clave_comprobante IS NOT NULL;
+END;
+GO
+
+IF NOT EXISTS
+(
+    SELECT 1
+    FROM sys.indexes
+    WHERE object_id = OBJECT_ID(N'dbo.Transferencias')
+      AND name = N'IX_Transferencias_CvuCbu_Monto_Fecha'
+)
+BEGIN
+    CREATE INDEX IX_Transferencias_CvuCbu_Monto_Fecha
+        ON dbo.Transferencias (cvu_cbu, monto, fecha)
+        INCLUDE (id_usuario_transferencia, clave_comprobante);
+END;
+GO
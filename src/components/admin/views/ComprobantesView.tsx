@@ -57,7 +57,7 @@ type StoredTransfer = {
 
 type ProcessImageResponse = {
   status?: "stored" | "duplicate"
-  analysis?: AnalyzeUploadImageResult
+  analysis_id?: string | null
   duplicate?: StoredTransfer
   transfer?: StoredTransfer
   error?: string
@@ -72,10 +72,13 @@ type BatchStats = {
   errors: string[]
 }
 
-type DuplicateReview = {
+type PendingDuplicate = {
   image: UploadImage
   result: ProcessImageResponse
-  remaining: UploadImage[]
+}
+
+type DuplicateReview = PendingDuplicate & {
+  remaining: PendingDuplicate[]
   stats: BatchStats
 }
 
@@ -366,9 +369,7 @@ export default function ComprobantesView() {
   const [analysisImage, setAnalysisImage] = useState<UploadImage | null>(null)
   const [imageModalMode, setImageModalMode] = useState<"view" | "analyze">("view")
   const [analysisResult, setAnalysisResult] = useState<AnalysisResult | null>(null)
-  const [analysisResultsByPath, setAnalysisResultsByPath] = useState<
-    Record<string, AnalyzeUploadImageResult>
-  >({})
+  const [analysisIdsByPath, setAnalysisIdsByPath] = useState<Record<string, string>>({})
   const [isAnalyzing, setIsAnalyzing] = useState(false)
   const [isProcessing, setIsProcessing] = useState(false)
   const [isDeletingProcessed, setIsDeletingProcessed] = useState(false)
@@ -443,10 +444,13 @@ export default function ComprobantesView() {
         }
 
         setAnalysisResult(mapAnalysisResult(response))
-        setAnalysisResultsByPath(prev => ({
-          ...prev,
-          [image.filePath]: response
-        }))
+        const analysisId = response.analysis_id
+        if (analysisId) {
+          setAnalysisIdsByPath(prev => ({
+            ...prev,
+            [image.filePath]: analysisId
+          }))
+        }
 
         if (!response?.match && !response?.amount && !response?.created) {
           setStatusMessage("No se detectaron CVU, CBU, fecha ni monto en la imagen seleccionada.")
@@ -485,47 +489,69 @@ export default function ComprobantesView() {
     [refreshImages]
   )
 
+  const reviewDuplicates = useCallback(
+    async (pending: PendingDuplicate[], stats: BatchStats) => {
+      const [next, ...remaining] = pending
+      if (!next) {
+        await finishProcessingBatch(stats)
+        return
+      }
+
+      setProcessingProgress(`Coincidencia encontrada: ${next.image.fileName}`)
+      setDuplicateReview({ ...next, remaining, stats })
+    },
+    [finishProcessingBatch]
+  )
+
   const processImageQueue = useCallback(
     async (queue: UploadImage[], initialStats: BatchStats) => {
-      if (!electronAPI?.processUploadImage) {
+      if (!electronAPI?.processUploadImages) {
         setIsProcessing(false)
         setErrorMessage("La accion de procesar imagenes no se encuentra disponible.")
         return
       }
 
       let stats = initialStats
-      for (let index = 0; index < queue.length; index += 1) {
-        const image = queue[index]
-        const completed = stats.stored + stats.skipped + stats.errors.length
-        setProcessingProgress(`Procesando ${completed + 1} de ${stats.total}: ${image.fileName}`)
-
-        try {
-          const response = (await electronAPI.processUploadImage(
-            image.filePath,
-            false,
-            analysisResultsByPath[image.filePath]
-          )) as ProcessImageResponse
-
-          if (response.error) {
+      const duplicates: PendingDuplicate[] = []
+      const batchId = `process-${Date.now()}`
+      const fileNames = new Map<string, string>(queue.map(image => [image.filePath, image.fileName]))
+      setProcessingProgress(`Procesando 1 de ${queue.length}: ${queue[0]?.fileName ?? ""}`)
+      const unsubscribe = electronAPI.onProcessUploadImagesEvent?.(event => {
+        if (event.batchId !== batchId) {
+          return
+        }
+        if (event.stage === "store") {
+          setProcessingProgress(`Guardando ${event.total} comprobante${event.total === 1 ? "" : "s"}...`)
+        } else {
+          const fileName = (event.path && fileNames.get(event.path)) || event.path || ""
+          setProcessingProgress(`Procesando ${event.completed} de ${event.total}: ${fileName}`)
+        }
+      })
+
+      try {
+        const response = await electronAPI.processUploadImages(
+          queue.map(image => ({
+            filePath: image.filePath,
+            analysisId: analysisIdsByPath[image.filePath]
+          })),
+          false,
+          batchId
+        )
+        if (response.error) {
+          throw new Error(response.details || response.error)
+        }
+
+        const results = response.results ?? []
+        queue.forEach((image, index) => {
+          const result = results[index] as ProcessImageResponse | undefined
+          if (result?.error) {
             stats = {
               ...stats,
-              errors: [...stats.errors, formatProcessError(image, response)]
+              errors: [...stats.errors, formatProcessError(image, result)]
             }
-            continue
-          }
-
-          if (response.status === "duplicate" && response.duplicate) {
-            setProcessingProgress(`Coincidencia encontrada: ${image.fileName}`)
-            setDuplicateReview({
-              image,
-              result: response,
-              remaining: queue.slice(index + 1),
-              stats
-            })
-            return
-          }
-
-          if (response.status === "stored") {
+          } else if (result?.status === "duplicate" && result.duplicate) {
+            duplicates.push({ image, result })
+          } else if (result?.status === "stored") {
             stats = { ...stats, stored: stats.stored + 1 }
           } else {
             stats = {
@@ -533,20 +559,20 @@ export default function ComprobantesView() {
               errors: [...stats.errors, `${image.fileName}: respuesta inesperada`]
             }
           }
-        } catch (error) {
-          stats = {
-            ...stats,
-            errors: [
-              ...stats.errors,
-              `${image.fileName}: ${error instanceof Error ? error.message : "error desconocido"}`
-            ]
-          }
+        })
+      } catch (error) {
+        const message = error instanceof Error ? error.message : "error desconocido"
+        stats = {
+          ...stats,
+          errors: [...stats.errors, ...queue.map(image => `${image.fileName}: ${message}`)]
         }
+      } finally {
+        unsubscribe?.()
       }
 
-      await finishProcessingBatch(stats)
+      await reviewDuplicates(duplicates, stats)
     },
-    [analysisResultsByPath, electronAPI, finishProcessingBatch]
+    [analysisIdsByPath, electronAPI, reviewDuplicates]
   )
 
   const handleProcessImages = useCallback(() => {
@@ -615,13 +641,13 @@ export default function ComprobantesView() {
     }
 
     setIsDuplicateActionRunning(true)
-    const { image, remaining } = duplicateReview
+    const { image, remaining, result } = duplicateReview
     let stats = duplicateReview.stats
     try {
       const response = (await electronAPI.processUploadImage(
         image.filePath,
         true,
-        analysisResultsByPath[image.filePath]
+        result.analysis_id ?? analysisIdsByPath[image.filePath]
       )) as ProcessImageResponse
       if (response.error || response.status !== "stored") {
         stats = {
@@ -643,8 +669,8 @@ export default function ComprobantesView() {
 
     setDuplicateReview(null)
     setIsDuplicateActionRunning(false)
-    await processImageQueue(remaining, stats)
-  }, [analysisResultsByPath, duplicateReview, electronAPI, processImageQueue])
+    await reviewDuplicates(remaining, stats)
+  }, [analysisIdsByPath, duplicateReview, electronAPI, reviewDuplicates])
 
   const handleSkipDuplicate = useCallback(async () => {
     if (!duplicateReview || !electronAPI?.markUploadProcessed) {
@@ -676,8 +702,8 @@ export default function ComprobantesView() {
 
     setDuplicateReview(null)
     setIsDuplicateActionRunning(false)
-    await processImageQueue(remaining, stats)
-  }, [duplicateReview, electronAPI, processImageQueue])
+    await reviewDuplicates(remaining, stats)
+  }, [duplicateReview, electronAPI, reviewDuplicates])
 
   const handleSelectImage = useCallback((image: UploadImage) => {
     setSelectedImage(image)
@@ -203,6 +203,7 @@ export interface OcrFieldResult {
 
 export interface AnalyzeUploadImageResult {
   ok?: boolean
+  analysis_id?: string | null
   scanner?: string
   match?: OcrAccountMatch | null
   text?: string
@@ -216,17 +217,73 @@ export interface AnalyzeUploadImageResult {
   }
   missing_fields?: string[]
   warnings?: Array<{ code: string; message: string }>
+  canonical?: {
+    account: string | null
+    amount: string | null
+    payment_datetime: string | null
+  }
   ocr?: {
     engine?: string
     version?: string | null
     language?: string
     average_confidence?: number | null
     selected_attempt?: string | null
+    cache_hit?: boolean
+  }
+  file?: {
+    path: string
+    size_bytes: number
+    detected_format: string
+    sha256: string
+    normalization: {
+      original_size: [number, number]
+      decoded_size: [number, number]
+      size: [number, number]
+      scale: number
+      draft: boolean
+      text_height: number | null
+      duration_ms: number
+    }
   }
   error?: string
   details?: string
 }
 
+export interface AnalyzeUploadBatchPayload {
+  directory?: string
+  filePaths?: string[]
+  batchId?: string | number
+}
+
+export interface AnalyzeUploadBatchItem {
+  path: string
+  ok: boolean
+  error: string | null
+  cache_hit: boolean
+}
+
+export interface AnalyzeUploadBatchEvent {
+  batchId: string | number | null
+  type: "result"
+  index: number
+  total: number
+  path: string
+  result: AnalyzeUploadImageResult
+}
+
+export interface AnalyzeUploadBatchResult {
+  status?: "completed"
+  total?: number
+  succeeded?: number
+  failed?: number
+  cache_hits?: number
+  duration_ms?: number
+  items?: AnalyzeUploadBatchItem[]
+  results?: AnalyzeUploadImageResult[]
+  error?: string
+  details?: string
+}
+
 export interface StoredTransferResult {
   id_transferencia: number
   cvu_cbu: string
@@ -236,6 +293,22 @@ export interface StoredTransferResult {
   nombre_asociado?: string | null
   estado?: "NO-CARGADA" | "CARGADA" | string | null
   id_usuario_transferencia: number
+  clave_comprobante?: string | null
+  cod_cliente?: number | null
+  nro_lugar_entrega?: number | null
+  orden?: number | null
+}
+
+export interface AccountCorrection {
+  from: string
+  to: string
+  distance: number
+}
+
+export interface AccountSuggestion {
+  cvu_cbu: string
+  distance: number
+  id_usuario_transferencia: number
   cod_cliente?: number | null
   nro_lugar_entrega?: number | null
   orden?: number | null
@@ -243,15 +316,43 @@ export interface StoredTransferResult {
 
 export interface ProcessUploadImageResult {
   status?: "stored" | "duplicate"
-  analysis?: AnalyzeUploadImageResult
+  analysis_id?: string | null
   duplicate?: StoredTransferResult
   duplicates?: StoredTransferResult[]
   transfer?: StoredTransferResult
+  account_correction?: AccountCorrection
+  account_suggestions?: AccountSuggestion[]
   error?: string
   details?: string
   missing_fields?: string[]
 }
 
+export interface ProcessUploadImagesItem {
+  filePath: string
+  analysisId?: string | null
+}
+
+export interface ProcessUploadImagesResult {
+  status?: "completed"
+  total?: number
+  stored?: number
+  duplicates?: number
+  failed?: number
+  duration_ms?: number
+  results?: Array<ProcessUploadImageResult & { image_path: string }>
+  error?: string
+  details?: string
+}
+
+export interface ProcessUploadImagesEvent {
+  batchId: string | number | null
+  type: "progress"
+  stage: "read" | "store"
+  completed: number
+  total: number
+  path: string | null
+}
+
 export interface MarkUploadProcessedResult {
   status?: "processed"
   file_path?: string
@@ -497,11 +598,21 @@ export interface ElectronAPI {
   listUploadImages: () => Promise<UploadImagesResult>
   deleteProcessedUploadImages: () => Promise<DeleteProcessedUploadImagesResult>
   analyzeUploadImage: (filePath: string) => Promise<AnalyzeUploadImageResult>
+  analyzeUploadBatch: (payload?: AnalyzeUploadBatchPayload) => Promise<AnalyzeUploadBatchResult>
+  onAnalyzeUploadBatchEvent: (callback: (event: AnalyzeUploadBatchEvent) => void) => () => void
   processUploadImage: (
     filePath: string,
     allowDuplicate?: boolean,
-    analysis?: AnalyzeUploadImageResult
+    analysisId?: string | null
   ) => Promise<ProcessUploadImageResult>
+  processUploadImages: (
+    images: ProcessUploadImagesItem[],
+    allowDuplicate?: boolean,
+    batchId?: string | number
+  ) => Promise<ProcessUploadImagesResult>
+  onProcessUploadImagesEvent: (
+    callback: (event: ProcessUploadImagesEvent) => void
+  ) => () => void
   markUploadProcessed: (filePath: string) => Promise<MarkUploadProcessedResult>
   listTransferTable: (tableName: TransferTableName) => Promise<TransferTableResult>
   deleteTransferTableRow: (
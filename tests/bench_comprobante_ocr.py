@@ -0,0 +1,136 @@
+"""Parser throughput benchmark: ``npm run bench:ocr``.
+
+Parses a full-size receipt on its own and the way ``analyze_upload_image``
+does, grouping the TSV words of several OCR passes into lines and merging
+them, and reports parses per second.  Line grouping is also timed on its
+own, from ``image_to_data``'s dict form and from the raw TSV.  The line cache is cleared before
+every parse.
+"""
+
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import comprobante_ocr  # noqa: E402
+from comprobante_ocr import (  # noqa: E402
+    merge_ocr_attempts,
+    ocr_data_to_lines,
+    parse_mercado_pago_text,
+    tsv_to_lines,
+)
+
+
+RECEIPT_LINES = (
+    "12:41 4G 87%",
+    "mercado pago",
+    "Comprobante de transferencia",
+    "Transferencia realizada",
+    "Miércoles, 7 de mayo de 2026 a las 14:35 hs",
+    "$ 12.345,67",
+    "Motivo: Varios",
+    "De",
+    "María José Fernández",
+    "CUIT/CUIL: 27-31234567-4",
+    "Mercado Pago",
+    "CVU: 0000003100012345678907",
+    "Para",
+    "Distribuidora Naviera S.R.L.",
+    "CUIT/CUIL: 30-71234567-8",
+    "Banco de la Nación Argentina",
+    "CBU: 2850590940090418135201",
+    "Código de identificación",
+    "A1B2C3D4E5F6",
+    "Número de operación de Mercado Pago",
+    "98765432101",
+    "Creada el 7 de mayo de 2026 - 14:35",
+    "Importe $ 12.345,67",
+    "Ayuda",
+    "Compartir comprobante",
+)
+TSV_COLUMNS = (
+    "level", "page_num", "block_num", "par_num", "line_num", "word_num",
+    "left", "top", "width", "height", "conf", "text",
+)
+PASS_NAMES = ("full", "full_scaled", "sparse", "account_crop", "amount_crop", "date_crop")
+TODAY = date(2026, 6, 2)
+
+
+def _ocr_data(pass_index):
+    # image_to_data's dict form: one entry per word, grouped into lines.
+    data = {key: [] for key in TSV_COLUMNS}
+    for line_index, text in enumerate(RECEIPT_LINES):
+        confidence = 60 + 5 * ((pass_index + line_index) % 7)
+        for word_index, word in enumerate(text.split()):
+            for key, value in zip(
+                TSV_COLUMNS,
+                (
+                    5, 1, 1, 1, line_index, word_index,
+                    40 + 90 * word_index, 30 + 60 * line_index, 80, 40,
+                    str(confidence), word,
+                ),
+            ):
+                data[key].append(value)
+    return data
+
+
+def _ocr_tsv(data):
+    rows = ["\t".join(TSV_COLUMNS)]
+    rows.extend(
+        "\t".join(str(value) for value in row)
+        for row in zip(*(data[key] for key in TSV_COLUMNS))
+    )
+    return "\n".join(rows)
+
+
+def _merge_passes(passes):
+    attempts = []
+    for name, tsv in passes:
+        lines = tsv_to_lines(tsv)
+        attempts.append({"name": name, "text": "\n".join(RECEIPT_LINES), "lines": lines})
+    return merge_ocr_attempts(attempts, today=TODAY)
+
+
+def _cold(run):
+    # Every iteration stands for a receipt the parser has not seen before.
+    def _run():
+        comprobante_ocr._line_features.cache_clear()
+        run()
+    return _run
+
+
+def _rate(label, run, seconds):
+    run()
+    count = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < seconds:
+        run()
+        count += 1
+        elapsed = time.perf_counter() - started
+    print(f"{label:<32} {count / elapsed:10.1f} /s")
+
+
+def main(seconds=2.0):
+    text = "\n".join(RECEIPT_LINES)
+    data = _ocr_data(0)
+    tsv = _ocr_tsv(data)
+    passes = [(name, _ocr_tsv(_ocr_data(index))) for index, name in enumerate(PASS_NAMES)]
+    _rate("ocr_data_to_lines", _cold(lambda: ocr_data_to_lines(data)), seconds)
+    _rate("tsv_to_lines", _cold(lambda: tsv_to_lines(tsv)), seconds)
+    _rate(
+        "parse_mercado_pago_text",
+        _cold(lambda: parse_mercado_pago_text(text, today=TODAY)),
+        seconds,
+    )
+    _rate(
+        f"merge_ocr_attempts ({len(passes)} passes)",
+        _cold(lambda: _merge_passes(passes)),
+        seconds,
+    )
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 2.0)
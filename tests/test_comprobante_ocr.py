@@ -1,7 +1,20 @@
 import unittest
-from datetime import date
+from datetime import date, datetime
+from decimal import Decimal
 
-from comprobante_ocr import merge_ocr_attempts, parse_mercado_pago_text
+from comprobante_ocr import (
+    account_checksum_valid,
+    decode_canonical,
+    incomplete_fields,
+    index_account,
+    locate_field_regions,
+    merge_ocr_attempts,
+    ocr_data_to_lines,
+    parse_mercado_pago_text,
+    receipt_key,
+    similar_accounts,
+    tsv_to_lines,
+)
 
 
 class MercadoPagoParserTests(unittest.TestCase):
@@ -10,24 +23,64 @@ class MercadoPagoParserTests(unittest.TestCase):
             """
             Comprobante de transferencia
             Juan Perez
-            CVU: 0000003100012345678901
+            CVU: 0000003100012345678907
             Importe $ 12.345,67
             Creada el 7 de mayo de 2026 - 14:35
             """,
             today=date(2026, 6, 2),
         )
 
-        fields = result["fields"]
-        self.assertEqual(fields["payer_name"]["value"], "Juan Perez")
-        self.assertEqual(fields["account"]["type"], "CVU")
-        self.assertEqual(fields["account"]["value"], "0000003100012345678901")
-        self.assertEqual(fields["account"]["validation"], "valid")
-        self.assertEqual(fields["amount"]["value"], "12345.67")
-        self.assertEqual(fields["amount"]["display"], "$ 12.345,67")
-        self.assertEqual(fields["payment_date"]["value"], "2026-05-07")
-        self.assertEqual(fields["payment_date"]["datetime"], "2026-05-07T14:35")
-        self.assertEqual(fields["payment_date"]["display"], "07/05/2026 - 14:35")
-        self.assertEqual(result["missing_fields"], [])
+        fields = result.fields
+        self.assertEqual(fields["payer_name"].value, "Juan Perez")
+        self.assertEqual(fields["account"].type, "CVU")
+        self.assertEqual(fields["account"].value, "0000003100012345678907")
+        self.assertEqual(fields["account"].validation, "valid")
+        self.assertEqual(fields["amount"].value, "12345.67")
+        self.assertEqual(fields["amount"].display, "$ 12.345,67")
+        self.assertEqual(fields["payment_date"].value, "2026-05-07")
+        self.assertEqual(fields["payment_date"].datetime, "2026-05-07T14:35")
+        self.assertEqual(fields["payment_date"].display, "07/05/2026 - 14:35")
+        self.assertEqual(result.missing_fields, [])
+        self.assertEqual(
+            result.canonical(),
+            {
+                "account": "0000003100012345678907",
+                "amount": Decimal("12345.67"),
+                "payment_datetime": datetime(2026, 5, 7, 14, 35),
+            },
+        )
+        self.assertEqual(
+            decode_canonical(result.as_dict()["canonical"]),
+            result.canonical(),
+        )
+        self.assertIsNone(decode_canonical({"account": "0000003100012345"}))
+
+    def test_receipt_key_is_stable_for_the_same_receipt(self):
+        key = receipt_key(
+            "0000003100012345678907",
+            Decimal("12345.6700"),
+            datetime(2026, 5, 7, 14, 35),
+            "AB" * 32,
+        )
+        self.assertEqual(len(key), 64)
+        self.assertEqual(
+            key,
+            receipt_key(
+                "0000003100012345678907",
+                Decimal("12345.67"),
+                datetime(2026, 5, 7, 14, 35, 0, 250000),
+                "ab" * 32,
+            ),
+        )
+        self.assertNotEqual(
+            key,
+            receipt_key(
+                "0000003100012345678907",
+                Decimal("12345.67"),
+                datetime(2026, 5, 7, 14, 35),
+                "cd" * 32,
+            ),
+        )
 
     def test_supports_patnav_displayed_date_layout(self):
         result = parse_mercado_pago_text(
@@ -41,13 +94,13 @@ class MercadoPagoParserTests(unittest.TestCase):
             today=date(2026, 6, 2),
         )
 
-        fields = result["fields"]
-        self.assertEqual(fields["payer_name"]["value"], "Maria Gomez")
-        self.assertEqual(fields["payment_date"]["value"], "2026-06-03")
-        self.assertTrue(fields["payment_date"]["year_inferred"])
+        fields = result.fields
+        self.assertEqual(fields["payer_name"].value, "Maria Gomez")
+        self.assertEqual(fields["payment_date"].value, "2026-06-03")
+        self.assertTrue(fields["payment_date"].year_inferred)
         self.assertIn(
             "DATE_YEAR_INFERRED",
-            {warning["code"] for warning in result["warnings"]},
+            {warning["code"] for warning in result.warnings},
         )
 
     def test_uses_previous_year_across_year_boundary(self):
@@ -56,7 +109,25 @@ class MercadoPagoParserTests(unittest.TestCase):
             today=date(2026, 1, 3),
         )
 
-        self.assertEqual(result["fields"]["payment_date"]["value"], "2025-12-28")
+        self.assertEqual(result.fields["payment_date"].value, "2025-12-28")
+
+    def test_finds_payer_above_account_label_after_blank_lines(self):
+        result = parse_mercado_pago_text(
+            "\n\n\n\n\nJuan Perez\nCVU\n0000003100012345678907",
+            today=date(2026, 6, 2),
+        )
+
+        self.assertEqual(result.fields["payer_name"].value, "Juan Perez")
+        self.assertEqual(result.fields["account"].value, "0000003100012345678907")
+
+    def test_finds_payer_above_inline_account_after_blank_lines(self):
+        result = parse_mercado_pago_text(
+            "\n\n\n\n\nJuan Perez\nCVU: 0000003100012345678907",
+            today=date(2026, 6, 2),
+        )
+
+        self.assertEqual(result.fields["payer_name"].value, "Juan Perez")
+        self.assertEqual(result.fields["account"].value, "0000003100012345678907")
 
     def test_accepts_common_ocr_misreads(self):
         result = parse_mercado_pago_text(
@@ -64,8 +135,8 @@ class MercadoPagoParserTests(unittest.TestCase):
             today=date(2026, 6, 2),
         )
 
-        self.assertEqual(result["fields"]["account"]["value"], "0000003100012345678901")
-        self.assertEqual(result["fields"]["amount"]["value"], "1250.50")
+        self.assertEqual(result.fields["account"].value, "0000003100012345678901")
+        self.assertEqual(result.fields["amount"].value, "1250.50")
 
     def test_reports_missing_fields_for_unclear_text(self):
         result = parse_mercado_pago_text(
@@ -74,7 +145,7 @@ class MercadoPagoParserTests(unittest.TestCase):
         )
 
         self.assertEqual(
-            set(result["missing_fields"]),
+            set(result.missing_fields),
             {"payer_name", "account", "amount", "payment_date"},
         )
 
@@ -95,9 +166,171 @@ class MercadoPagoParserTests(unittest.TestCase):
             today=date(2026, 7, 5),
         )
 
-        self.assertEqual(result["missing_fields"], [])
-        self.assertEqual(result["fields"]["account"]["source_attempt"], "full")
-        self.assertEqual(result["fields"]["payment_date"]["source_attempt"], "date_crop")
+        self.assertEqual(result.missing_fields, [])
+        self.assertEqual(result.fields["account"].source_attempt, "full")
+        self.assertEqual(result.fields["payment_date"].source_attempt, "date_crop")
+
+    def test_incomplete_fields_flags_missing_and_low_confidence(self):
+        complete = parse_mercado_pago_text(
+            "",
+            ocr_lines=[
+                {"text": "Juan Perez", "confidence": 0.91},
+                {"text": "CVU: 0000003100012345678907", "confidence": 0.88},
+                {"text": "Importe $ 12.345,67", "confidence": 0.42},
+                {"text": "Creada el 7 de mayo de 2026 - 14:35", "confidence": 0.9},
+            ],
+            today=date(2026, 6, 2),
+        )
+        self.assertEqual(incomplete_fields(complete), [])
+        self.assertEqual(incomplete_fields(complete, min_confidence=0.6), ["amount"])
+
+        partial = parse_mercado_pago_text(
+            "CVU 00000031000123\nCreada el 7 de mayo de 2026 - 14:35",
+            today=date(2026, 6, 2),
+        )
+        self.assertEqual(
+            incomplete_fields(partial),
+            ["payer_name", "account", "amount"],
+        )
+
+    def test_ocr_data_lines_keep_boxes_for_region_detection(self):
+        words = [
+            ("Juan", 1, 40, 100), ("Perez", 1, 120, 100),
+            ("CVU:", 2, 40, 160),
+            ("0000003100012345678901", 3, 40, 200),
+            ("Importe", 4, 40, 300), ("$", 4, 200, 300), ("12.345,67", 4, 230, 300),
+        ]
+        ocr_data = {
+            "text": [word[0] for word in words],
+            "conf": ["91"] * len(words),
+            "page_num": [1] * len(words),
+            "block_num": [1] * len(words),
+            "par_num": [1] * len(words),
+            "line_num": [word[1] for word in words],
+            "left": [word[2] for word in words],
+            "top": [word[3] for word in words],
+            "width": [60] * len(words),
+            "height": [20] * len(words),
+        }
+
+        lines = ocr_data_to_lines(ocr_data)
+        self.assertEqual(lines[0].box, (40, 100, 180, 120))
+        self.assertEqual(
+            lines[0].words[1].as_dict(),
+            {"text": "Perez", "confidence": 0.91, "box": (120, 100, 180, 120)},
+        )
+
+        fields = parse_mercado_pago_text("", ocr_lines=lines, today=date(2026, 6, 2)).fields
+        self.assertEqual(fields["account"].box, (40, 160, 100, 220))
+        self.assertEqual(fields["amount"].box, (40, 300, 290, 320))
+        self.assertNotIn("box", fields["amount"].as_dict())
+
+        regions = locate_field_regions(lines)
+        self.assertEqual(regions["account"], (40, 160, 100, 220))
+        self.assertEqual(regions["amount"], (40, 300, 290, 320))
+
+    def test_tsv_lines_match_image_to_data_lines(self):
+        words = [
+            ("Juan", 1, 40, 100, "91.5"), ("Perez", 1, 120, 100, "88"),
+            ("", 1, 190, 100, "-1"),
+            ("CVU:", 2, 40, 160, "90"), ("0000003100012345678907", 2, 110, 160, "77.25"),
+        ]
+        ocr_data = {
+            "text": [word[0] for word in words],
+            "conf": [word[4] for word in words],
+            "page_num": [1] * len(words),
+            "block_num": [1] * len(words),
+            "par_num": [1] * len(words),
+            "line_num": [word[1] for word in words],
+            "left": [word[2] for word in words],
+            "top": [word[3] for word in words],
+            "width": [60] * len(words),
+            "height": [20] * len(words),
+        }
+        tsv = "\n".join(
+            [
+                "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num"
+                "\tleft\ttop\twidth\theight\tconf\ttext",
+                "1\t1\t0\t0\t0\t0\t0\t0\t800\t600\t-1\t",
+                "4\t1\t1\t1\t1\t0\t40\t100\t210\t20\t-1\t",
+            ]
+            + [
+                f"5\t1\t1\t1\t{line}\t{index}\t{left}\t{top}\t60\t20\t{conf}\t{text}"
+                for index, (text, line, left, top, conf) in enumerate(words)
+            ]
+        )
+
+        expected = ocr_data_to_lines(ocr_data)
+        lines = tsv_to_lines(tsv)
+        self.assertEqual(
+            [(line.text, line.confidence, line.box) for line in lines],
+            [(line.text, line.confidence, line.box) for line in expected],
+        )
+        self.assertEqual(
+            [[word.as_dict() for word in line.words] for line in lines],
+            [[word.as_dict() for word in line.words] for line in expected],
+        )
+        fields = parse_mercado_pago_text("", ocr_lines=lines, today=date(2026, 6, 2)).fields
+        self.assertEqual(fields["account"].value, "0000003100012345678907")
+        self.assertEqual(tsv_to_lines(""), [])
+
+    def test_account_checksum_rejects_misread_digits(self):
+        self.assertTrue(account_checksum_valid("2850590940090418135201"))
+        self.assertFalse(account_checksum_valid("2850590940090418135202"))
+        self.assertFalse(account_checksum_valid("285059094009041813520"))
+
+        result = parse_mercado_pago_text("CBU 2850590940090418185201", today=date(2026, 6, 2))
+        self.assertEqual(result.fields["account"].validation, "invalid_checksum")
+        self.assertIn(
+            "ACCOUNT_CHECKSUM_FAILED",
+            {warning["code"] for warning in result.warnings},
+        )
+
+    def test_votes_account_digits_across_attempts(self):
+        readings = [
+            ("full", "CBU 2850590940090418135701", 0.7),
+            ("sparse", "CBU 2850590940090418135291", 0.6),
+            ("account_crop", "CBU 2850590940090418185201", 0.8),
+        ]
+        result = merge_ocr_attempts(
+            [
+                {"name": name, "text": text, "lines": [{"text": text, "confidence": confidence}]}
+                for name, text, confidence in readings
+            ],
+            today=date(2026, 6, 2),
+        )
+
+        account = result.as_dict()["fields"]["account"]
+        self.assertEqual(account["value"], "2850590940090418135201")
+        self.assertEqual(account["formatted"], "2850 5909 4009 0418 1352 01")
+        self.assertEqual(account["validation"], "valid")
+        self.assertEqual(account["source_attempt"], "digit_vote")
+        self.assertEqual(account["type"], "CBU")
+        self.assertEqual(account["votes"], 3)
+
+    def test_similar_accounts_finds_near_known_accounts(self):
+        index = {}
+        for account in (
+            "2850590940090418135201",
+            "0000003100012345678907",
+            "2850590940090418135299",
+        ):
+            index_account(index, account)
+
+        self.assertEqual(
+            similar_accounts(index, "2850590940090418185201"),
+            [("2850590940090418135201", 1)],
+        )
+        self.assertEqual(
+            similar_accounts(index, "2850590940090418135209"),
+            [("2850590940090418135201", 1), ("2850590940090418135299", 1)],
+        )
+        self.assertEqual(
+            similar_accounts(index, "0000003100012345678907"),
+            [("0000003100012345678907", 0)],
+        )
+        self.assertEqual(similar_accounts(index, "9999990940090418135201"), [])
+        self.assertEqual(similar_accounts(index, "285059094009041813520"), [])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,163 @@
+import unittest
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+try:
+    import script
+except ImportError:  # pyodbc needs the ODBC driver manager to import.
+    script = None
+
+
+class FakeCursor:
+    def __init__(self, ventas):
+        self.ventas = ventas
+        self.statements = []
+        self.rowcount = None
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        self.statements.append((sql, tuple(params)))
+        self.rowcount = None
+        self._rows = []
+        if "FROM dbo.Cobros WITH" in sql:
+            return
+        if "FROM (VALUES" in sql:
+            for offset in range(0, len(params), 4):
+                ordinal, tipo, prefijo, numero = params[offset : offset + 4]
+                venta = self.ventas.get((tipo, prefijo, numero))
+                if venta is not None:
+                    self._rows.append(SimpleNamespace(ordinal=ordinal, **venta))
+            return
+        if sql.lstrip().startswith("UPDATE v"):
+            self.rowcount = len(params) // 3
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.committed = False
+        self.rolled_back = False
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def acquire(self, timeout=None):
+        return self.conn
+
+    def release(self, conn):
+        pass
+
+    def discard(self, conn):
+        pass
+
+
+@unittest.skipIf(script is None, "script.py needs a loadable pyodbc")
+class ApplyTransferPaymentTests(unittest.TestCase):
+    def statements_matching(self, cursor, marker):
+        return [params for sql, params in cursor.statements if marker in sql]
+
+    def test_applies_payment_across_chunked_statements(self):
+        keys = [("FA", 1, numero) for numero in range(1, 6)]
+        ventas = {
+            key: {
+                "fecha_vencimiento": f"2026-05-0{key[2]}",
+                "Mcampo_control": "",
+                "monto": Decimal("100"),
+                "importe_aplicado": Decimal("0"),
+            }
+            for key in keys
+        }
+        cursor = FakeCursor(ventas)
+        conn = FakeConnection(cursor)
+
+        with mock.patch.object(script, "VENTA_LOOKUP_CHUNK_SIZE", 2), mock.patch.object(
+            script, "COBROS_APLICADOS_INSERT_CHUNK_SIZE", 2
+        ), mock.patch.object(script, "VENTA_UPDATE_CHUNK_SIZE", 2):
+            result = script.apply_transfer_payment(
+                FakePool(conn),
+                {"tipoComprobante": "RC", "prefijo": 1, "numero": 99},
+                {"codCliente": 7, "nroLugarEntrega": 1},
+                "450",
+                [
+                    {"tipoComprobante": tipo, "prefijo": prefijo, "numero": numero}
+                    for tipo, prefijo, numero in keys
+                ],
+            )
+
+        self.assertEqual(result.get("status"), "saved", result)
+        self.assertTrue(conn.committed)
+
+        lookups = self.statements_matching(cursor, "FROM (VALUES")
+        self.assertEqual([len(params) // 4 for params in lookups], [2, 2, 1])
+        self.assertEqual([params[0] for params in lookups], [0, 2, 4])
+
+        inserts = self.statements_matching(cursor, "INSERT INTO dbo.CobrosAplicados")
+        self.assertEqual([len(params) // 7 for params in inserts], [2, 2, 1])
+
+        updates = self.statements_matching(cursor, "SET Mcampo_control = 'P'")
+        self.assertEqual([len(params) // 3 for params in updates], [2, 2])
+
+        self.assertEqual(result["inserted_cobros_aplicados"], 5)
+        self.assertEqual(result["updated_ventas"], 4)
+        self.assertEqual(
+            [row["fully_paid"] for row in result["cobros_aplicados"]],
+            [True, True, True, True, False],
+        )
+        self.assertEqual(result["cobros_aplicados"][-1]["importe_aplicado"], "50")
+        self.assertEqual(result["remaining_transfer_amount"], "0")
+
+    def test_reports_missing_venta_from_a_later_chunk(self):
+        keys = [("FA", 1, numero) for numero in range(1, 4)]
+        ventas = {
+            key: {
+                "fecha_vencimiento": None,
+                "Mcampo_control": "",
+                "monto": Decimal("10"),
+                "importe_aplicado": Decimal("0"),
+            }
+            for key in keys[:2]
+        }
+        cursor = FakeCursor(ventas)
+        conn = FakeConnection(cursor)
+
+        with mock.patch.object(script, "VENTA_LOOKUP_CHUNK_SIZE", 2):
+            result = script.apply_transfer_payment(
+                FakePool(conn),
+                {"tipoComprobante": "RC", "prefijo": 1, "numero": 99},
+                {"codCliente": 7, "nroLugarEntrega": 1},
+                "30",
+                [
+                    {"tipoComprobante": tipo, "prefijo": prefijo, "numero": numero}
+                    for tipo, prefijo, numero in keys
+                ],
+            )
+
+        self.assertEqual(result.get("error"), "venta_not_found")
+        self.assertIn("FA 1 3", result["details"])
+        self.assertTrue(conn.rolled_back)
+        self.assertFalse(conn.committed)
+
+
+if __name__ == "__main__":
+    unittest.main()